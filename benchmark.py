@@ -0,0 +1,257 @@
+import os
+import sys
+import json
+import argparse
+import platform
+import tracemalloc
+import numpy as np
+from time import perf_counter
+from sudoku_solver import SudokuSolver, BACKENDS
+from solve_file import read_puzzles
+
+# Bundled puzzle files, one 81 character puzzle per line. Every puzzle in them has a unique solution.
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks')
+CORPORA = ('easy', 'hard', '17clue')
+BASELINE_PATH = os.path.join(CORPUS_DIR, 'baseline.json')
+
+# Times each puzzle is solved when neither the command line nor the baseline says otherwise
+DEFAULT_REPEAT = 5
+
+# Metrics compared against the baseline, and whether a higher value is better. The speed of a shared or virtual machine
+# drifts by half or more over a few seconds, so timings are gated relative to a reference workload run next to each
+# solve (see measure). Times in milliseconds are only reported, as is p99_ms: with a dozen puzzles per corpus it is the
+# time of the slowest one.
+METRICS = {'relative_mean': False, 'relative_p50': False, 'peak_memory_kb': False}
+
+def run_reference():
+    """
+    Fixed pure Python workload, independent of the solver, whose time tracks the current speed of the machine.
+    """
+    cells = list(range(81))
+    total = 0
+
+    for k in range(3000):
+        total ^= cells[k % 81] << (k & 7)
+
+    return total
+
+def load_corpus(name):
+    """
+    Returns the puzzles of a bundled corpus as a list of 9x9 int32 arrays.
+    """
+    with open(os.path.join(CORPUS_DIR, name + '.txt')) as infile:
+        return list(read_puzzles(infile))
+
+def measure(puzzles, backend, repeat=1):
+    """
+    Solves every puzzle repeat times with a new SudokuSolver using the given backend. The time in milliseconds of each
+    puzzle is the best of its runs. Each solve also gets a relative time: its time divided by the mean time of the
+    reference workload run just before and just after it, so that a machine which slows down or speeds up partway
+    through changes both alike. The relative time of each puzzle is the median of its runs.
+    Returns a dictionary of:
+        - puzzles: number of puzzles
+        - solved: number of puzzles solved
+        - repeat: number of runs of each puzzle
+        - puzzles_per_sec: puzzles solved per second, from the time of each puzzle
+        - p50_ms, p99_ms: median and 99th percentile time to solve one puzzle, in milliseconds
+        - relative_mean, relative_p50: mean and median relative time of one puzzle
+        - peak_memory_kb: most memory allocated while solving any one puzzle, measured in a separate run since
+          tracing allocations slows the solver down
+    """
+    if repeat < 1:
+        raise ValueError("repeat must be at least 1")
+
+    latencies = [float('inf')] * len(puzzles)
+    relative = [[] for _ in puzzles]
+    solved = 0
+
+    start = perf_counter()
+    run_reference()
+    reference = perf_counter() - start
+
+    for _ in range(repeat):
+        solved = 0
+
+        for k, puzzle in enumerate(puzzles):
+            start = perf_counter()
+            solution = SudokuSolver(puzzle, backend=backend).solve()
+            latency = perf_counter() - start
+
+            # The reference run after this solve is also the one before the next
+            start = perf_counter()
+            run_reference()
+            previous, reference = reference, perf_counter() - start
+
+            latencies[k] = min(latencies[k], latency)
+            relative[k].append(2 * latency / (previous + reference))
+
+            if solution is not None:
+                solved += 1
+
+    peak_memory = 0
+
+    for puzzle in puzzles:
+        tracemalloc.start()
+        SudokuSolver(puzzle, backend=backend).solve()
+        peak_memory = max(peak_memory, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    latencies = np.array(latencies) * 1000
+    relative = np.median(relative, axis=1)
+
+    return {
+        'puzzles': len(puzzles),
+        'solved': solved,
+        'repeat': repeat,
+        'puzzles_per_sec': len(latencies) / latencies.sum() * 1000,
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'relative_mean': float(relative.mean()),
+        'relative_p50': float(np.median(relative)),
+        'peak_memory_kb': peak_memory / 1024,
+    }
+
+def run(corpora=CORPORA, backends=BACKENDS, repeat=1):
+    """
+    Measures every backend on every corpus. Returns a dictionary of results keyed by corpus, then backend.
+    """
+    results = {}
+
+    for name in corpora:
+        puzzles = load_corpus(name)
+        results[name] = {backend: measure(puzzles, backend, repeat) for backend in backends}
+
+    return results
+
+def describe_machine():
+    """
+    Returns a dictionary describing the machine and software versions the benchmarks run on, stored with a baseline
+    since timings are only comparable on the same setup.
+    """
+    return {
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+    }
+
+def compare(results, baseline, threshold=0.25):
+    """
+    Compares results against baseline results from an earlier run. Returns a list of messages, one for each metric
+    which got worse by more than threshold (a fraction of the baseline value), for a corpus which is no longer fully
+    solved, or for results measured with a different number of runs than the baseline, which are not comparable.
+    Corpora and backends missing from either side are skipped, as is the baseline's machine description.
+    """
+    regressions = []
+
+    for name, backends in results.items():
+        for backend, result in backends.items():
+            base = baseline.get(name, {}).get(backend)
+
+            if base is None:
+                continue
+
+            label = "{} {}".format(name, backend)
+
+            if result['solved'] < result['puzzles']:
+                regressions.append("{}: solved {} of {} puzzles".format(label, result['solved'], result['puzzles']))
+
+            if base.get('repeat') != result['repeat']:
+                regressions.append("{}: measured with --repeat {}, but the baseline with --repeat {}".format(
+                    label, result['repeat'], base.get('repeat')))
+                continue
+
+            for metric, higher_is_better in METRICS.items():
+                old, new = base[metric], result[metric]
+                change = (old - new) / old if higher_is_better else (new - old) / old
+
+                if change > threshold:
+                    regressions.append("{}: {} {:.2f} -> {:.2f} ({:.0%} worse)".format(label, metric, old, new, change))
+
+    return regressions
+
+def get_baseline_repeat(baseline):
+    """
+    Returns the number of runs of each puzzle the baseline was measured with, or None if there is no baseline or it
+    does not record one.
+    """
+    for name in CORPORA:
+        for result in (baseline or {}).get(name, {}).values():
+            if 'repeat' in result:
+                return result['repeat']
+
+    return None
+
+def format_results(results):
+    """
+    Returns a table of results for printing.
+    """
+    lines = ["{:<8} {:<13} {:>7} {:>10} {:>9} {:>9} {:>9} {:>9} {:>10}".format(
+        'corpus', 'backend', 'solved', 'puzzles/s', 'p50 ms', 'p99 ms', 'rel mean', 'rel p50', 'peak KB')]
+
+    for name, backends in results.items():
+        for backend, result in backends.items():
+            lines.append("{:<8} {:<13} {:>7} {:>10.1f} {:>9.2f} {:>9.2f} {:>9.2f} {:>9.2f} {:>10.1f}".format(
+                name, backend, "{}/{}".format(result['solved'], result['puzzles']), result['puzzles_per_sec'],
+                result['p50_ms'], result['p99_ms'], result['relative_mean'], result['relative_p50'],
+                result['peak_memory_kb']))
+
+    return '\n'.join(lines)
+
+def main(argv=None):
+    """
+    Runs the benchmarks, prints a table of results and compares them against the baseline file.
+    Returns the exit status: 1 if any regression was found or there is no baseline to compare against, otherwise 0.
+    """
+    parser = argparse.ArgumentParser(description="Measure solver speed and memory on the bundled puzzle corpora.")
+    parser.add_argument('--corpus', action='append', choices=CORPORA, help="corpus to run (default all), repeatable")
+    parser.add_argument('--backend', action='append', choices=BACKENDS, help="backend to run (default all), repeatable")
+    parser.add_argument('--repeat', type=int,
+                        help="times each puzzle is solved, keeping the best time (default the baseline's, or {})".format(
+                            DEFAULT_REPEAT))
+    parser.add_argument('-o', '--output', help="file to write the results to as JSON")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="baseline results to compare against")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="fraction by which a metric may get worse before it counts as a regression (default 0.25)")
+    parser.add_argument('--save-baseline', action='store_true', help="store the results as the new baseline")
+    args = parser.parse_args(argv)
+    baseline = None
+
+    if not args.save_baseline:
+        if not os.path.exists(args.baseline):
+            sys.stderr.write("no baseline at {}, run with --save-baseline to create one\n".format(args.baseline))
+            return 1
+
+        with open(args.baseline) as infile:
+            baseline = json.load(infile)
+
+    repeat = args.repeat or get_baseline_repeat(baseline) or DEFAULT_REPEAT
+    results = run(args.corpus or CORPORA, args.backend or BACKENDS, repeat)
+    print(format_results(results))
+
+    if args.output:
+        with open(args.output, 'w') as outfile:
+            json.dump(results, outfile, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as outfile:
+            json.dump(dict(results, machine=describe_machine()), outfile, indent=2)
+
+        return 0
+
+    if 'machine' in baseline:
+        machine = baseline['machine']
+        sys.stderr.write("comparing against a baseline from {} ({}, {} CPUs, Python {}, numpy {})\n".format(
+            machine['platform'], machine['processor'], machine['cpus'], machine['python'], machine['numpy']))
+
+    regressions = compare(results, baseline, args.threshold)
+
+    for message in regressions:
+        sys.stderr.write("regression: {}\n".format(message))
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
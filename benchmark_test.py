@@ -0,0 +1,110 @@
+from benchmark import load_corpus, measure, run, compare, main, get_baseline_repeat, CORPORA, BASELINE_PATH
+from sudoku_solver import SudokuSolver
+import numpy as np
+import json
+import os
+import pytest
+
+class TestBenchmark:
+
+    def setup_method(self):
+        self.result = {'puzzles': 12, 'solved': 12, 'repeat': 5, 'puzzles_per_sec': 100.0, 'p50_ms': 5.0,
+                       'p99_ms': 20.0, 'relative_mean': 8.0, 'relative_p50': 4.0, 'peak_memory_kb': 50.0}
+        self.baseline = {'hard': {'dlx': dict(self.result)}}
+
+    @pytest.mark.parametrize('name', CORPORA)
+    def test_corpus_puzzles_have_unique_solutions(self, name):
+        puzzles = load_corpus(name)
+
+        assert len(puzzles) > 0
+
+        for puzzle in puzzles:
+            assert SudokuSolver(puzzle).has_unique_solution()
+
+    def test_17clue_corpus_clue_counts(self):
+        assert all(np.count_nonzero(puzzle) == 17 for puzzle in load_corpus('17clue'))
+
+    def test_measure(self):
+        result = measure(load_corpus('easy')[:3], 'backtracking', repeat=2)
+
+        assert result['puzzles'] == result['solved'] == 3
+        assert result['repeat'] == 2
+        assert result['puzzles_per_sec'] > 0 and result['peak_memory_kb'] > 0
+        assert 0 < result['p50_ms'] <= result['p99_ms']
+        assert result['relative_mean'] > 0 and result['relative_p50'] > 0
+
+        with pytest.raises(ValueError):
+            measure(load_corpus('easy')[:3], 'backtracking', repeat=0)
+
+    def test_run_selected_corpora_and_backends(self):
+        results = run(['easy'], ['dlx'], repeat=1)
+
+        assert list(results) == ['easy'] and list(results['easy']) == ['dlx']
+
+    def test_compare_within_threshold(self):
+        # Times in milliseconds are only reported, not compared
+        result = dict(self.result, relative_mean=9.6, puzzles_per_sec=50.0, p50_ms=10.0, p99_ms=60.0)
+
+        assert compare({'hard': {'dlx': result}}, self.baseline, threshold=0.25) == []
+
+    def test_compare_finds_regressions(self):
+        result = dict(self.result, relative_mean=12.0, peak_memory_kb=100.0)
+        regressions = compare({'hard': {'dlx': result}}, self.baseline, threshold=0.25)
+
+        assert len(regressions) == 2
+        assert 'relative_mean' in regressions[0] and 'peak_memory_kb' in regressions[1]
+
+    def test_compare_different_repeat(self):
+        result = dict(self.result, repeat=1)
+
+        assert compare({'hard': {'dlx': result}}, self.baseline) == [
+            "hard dlx: measured with --repeat 1, but the baseline with --repeat 5"]
+
+    def test_compare_same_run_passes(self, tmp_path):
+        path = str(tmp_path / 'baseline.json')
+        results = run(['easy', 'hard'], repeat=2)
+
+        with open(path, 'w') as outfile:
+            json.dump(dict(results, machine={}), outfile)
+
+        with open(path) as infile:
+            assert compare(results, json.load(infile)) == []
+
+    def test_compare_unsolved_puzzles(self):
+        result = dict(self.result, solved=11)
+
+        assert compare({'hard': {'dlx': result}}, self.baseline) == ["hard dlx: solved 11 of 12 puzzles"]
+
+    def test_compare_skips_missing_baseline(self):
+        assert compare({'easy': {'dlx': self.result}}, self.baseline) == []
+
+    def test_main_fails_without_baseline(self, tmp_path):
+        path = str(tmp_path / 'baseline.json')
+
+        assert main(['--corpus', 'easy', '--backend', 'dlx', '--repeat', '1', '--baseline', path]) == 1
+
+    def test_main_saves_and_compares_baseline(self, tmp_path):
+        path = str(tmp_path / 'baseline.json')
+        args = ['--corpus', 'easy', '--backend', 'dlx', '--baseline', path]
+
+        assert main(args + ['--repeat', '2', '--save-baseline']) == 0
+
+        with open(path) as infile:
+            baseline = json.load(infile)
+
+        assert baseline['easy']['dlx']['solved'] == 12
+        assert baseline['machine']['cpus'] == os.cpu_count()
+        assert get_baseline_repeat(baseline) == 2
+
+        # Without --repeat the baseline's count is used. Timings vary between runs, so only check that the comparison
+        # runs and finds no unsolved puzzles.
+        assert main(args + ['--threshold', '1000']) == 0
+        assert main(args + ['--repeat', '1', '--threshold', '1000']) == 1
+
+    def test_reference_baseline_stored(self):
+        with open(BASELINE_PATH) as infile:
+            baseline = json.load(infile)
+
+        assert set(CORPORA) <= set(baseline) and 'machine' in baseline
+        assert get_baseline_repeat(baseline) == 5
+        assert get_baseline_repeat(None) is None
@@ -1,24 +1,44 @@
 import pygame
+import threading
 import numpy as np
-from sudoku_solver import SudokuSolver
+from solver_session import SolverSession
+from sudoku_solver import SudokuSolver, StepLog
 from square import Square
+from glyph_atlas import get_atlas
+from grid_tables import get_geometry, get_box_size
 import constants
-from time import sleep
 
 class Board:
 
     def __init__(self, win, matrix):
         self.win = win
-        # Store initial matrix and solve it in text form
+        self.geometry = get_geometry(get_box_size(constants.ROWS))
+        # Store initial matrix and solve it in text form. The session checks each entry as it is made.
         self.start_matrix = np.copy(matrix)
-        self.current_matrix = matrix
-        self.solver = SudokuSolver(matrix)
-        self.solution = self.solver.solve()
+        self.current_matrix = np.copy(matrix)
+
+        # The puzzle is solved in a background thread so the window opens straight away. Until poll_solver picks up
+        # the finished session, entries are only recorded on the board and correctness checks are off.
+        self.session = None
+        self.solution = None
+        self.finished_session = None
+        self.solver_thread = threading.Thread(target=self.create_session, daemon=True)
+        self.solver_thread.start()
 
         self.squares = []
         self.selected_square = None
 
+        # Areas of the window drawn since the last display update
+        self.dirty_rects = []
+
+        # Steps of a solve being shown by solve_gui, position of the next one, steps per second and steps due
+        self.replay_steps = None
+        self.replay_pos = 0
+        self.replay_speed = constants.REPLAY_SPEED
+        self.replay_credit = 0.0
+
         self.draw_grid()
+        self.dirty_rects.append(self.win.get_rect())
         
     def draw_grid(self):
         """
@@ -28,7 +48,7 @@ class Board:
             self.squares.append([])
 
             for j in range(constants.COLS):
-                new_square = Square(self.win, i, j, self.start_matrix[i, j])
+                new_square = Square(self.win, i, j, self.start_matrix[i, j], self.dirty_rects)
                 new_square.draw()
                 new_square.write_initial_value()
 
@@ -82,7 +102,7 @@ class Board:
                 new_row = prior_row + vert
                 new_col = prior_col + horiz
 
-                if (0 <= new_row < 9) and (0 <= new_col < 9):
+                if (0 <= new_row < self.geometry.size) and (0 <= new_col < self.geometry.size):
                     is_correct = self.squares[new_row][new_col].is_correct
                     if is_correct >= 0:
                         self.squares[new_row][new_col].draw_border(bool(is_correct))
@@ -107,17 +127,39 @@ class Board:
                     self.select_square(current_row - 1, current_col)
 
             elif direction.lower() == 'down':
-                if current_row != 8:
+                if current_row != self.geometry.size - 1:
                     self.select_square(current_row + 1, current_col)
 
             elif direction.lower() == 'right':
-                if current_col != 8:
+                if current_col != self.geometry.size - 1:
                     self.select_square(current_row, current_col + 1)
 
             elif direction.lower() == 'left':
                 if current_col != 0:
                     self.select_square(current_row, current_col - 1)
 
+    def create_session(self):
+        """
+        Runs in the solver thread: solves the starting matrix and keeps the session for poll_solver.
+        """
+        self.finished_session = SolverSession(self.start_matrix)
+
+    def poll_solver(self):
+        """
+        Starts using the solver session once the background solve has finished, passing it the entries made so far.
+        Called from the frame loop. Returns True once the session is ready.
+        """
+        if self.session is None and not self.solver_thread.is_alive() and self.finished_session is not None:
+            session = self.finished_session
+
+            for i, j in zip(*np.nonzero((self.start_matrix == 0) & (self.current_matrix > 0))):
+                session.set_value(i, j, self.current_matrix[i, j])
+
+            self.session = session
+            self.solution = session.start_solution
+
+        return self.session is not None
+
     def update_square(self, value):
         """
         Updates the selected square with a given value. If value is 0, the square is cleared.
@@ -125,24 +167,41 @@ class Board:
         Arguments:
             - value: New value to update square.
         """
-        if self.selected_square:
+        if self.selected_square and self.selected_square.can_write:
+            row, col = self.selected_square.row, self.selected_square.col
             self.selected_square.update_value(value)
-            self.current_matrix[self.selected_square.row, self.selected_square.col] = value
+            self.current_matrix[row, col] = value
+
+            if self.session is not None:
+                self.session.set_value(row, col, value)
             
-            # Update green/red border
-            if self.selected_square.is_correct >= 0:
-                is_correct = (value == self.solution[self.selected_square.row, self.selected_square.col])
-                self.selected_square.draw_border(is_correct)
+                # Update green/red border
+                if self.selected_square.is_correct >= 0:
+                    self.selected_square.draw_border(self.session.is_correct(row, col))
+
+    def is_solvable(self):
+        """
+        Returns True if the puzzle can still be solved without changing any of the user's entries, or if that is not
+        known yet.
+        """
+        return self.session is None or self.session.is_solvable()
+
+    def is_solved(self):
+        """
+        Returns True if every square is filled in correctly. Takes constant time, so it can be checked every frame.
+        """
+        return self.session is not None and self.session.is_solved()
 
     def check_square(self, row, column):
         """
         Checks if square in given row and column has the correct value in it, drawing green border if it is correct, and
-        red if not. Removes border if the square is already being checked.
+        red if not. Removes border if the square is already being checked. Does nothing until the solution is known.
         """
+        if self.session is None:
+            return
 
         if self.squares[row][column].is_correct == -1:
-            is_correct = self.squares[row][column].value == self.solution[row, column]
-            self.squares[row][column].draw_border(is_correct)
+            self.squares[row][column].draw_border(self.session.is_correct(row, column))
 
         else:
             self.squares[row][column].remove_border()
@@ -151,131 +210,101 @@ class Board:
         """
         Tells user the the Sudoku has been solved correctly.
         """
-        pygame.font.init()
-        font = pygame.font.SysFont('calibri', 150)
+        text_surface = get_atlas().get_text("Solved!", 'banner')
+        self.dirty_rects.append(self.win.blit(text_surface, (150, 300)))
 
-        text_surface = font.render("Solved!", 1, constants.PINK)
-        self.win.blit(text_surface, (150, 300))
+    def update_display(self):
+        """
+        Updates only the areas of the display which were drawn since the last update. Does nothing if none were.
+        """
+        if self.dirty_rects:
+            pygame.display.update(self.dirty_rects)
+
+            # Squares share this list, so empty it rather than replacing it
+            del self.dirty_rects[:]
 
     def reset(self):
         """
         Resets the board to the original starting matrix, and removes all green and red borders.
         """
-        for i in range(constants.ROWS):
-            for j in range(constants.COLS):
-                self.current_matrix[i, j] = self.start_matrix[i, j]
-                self.squares[i][j].update_value(self.current_matrix[i, j])
-                self.squares[i][j].remove_border()
-    
-    def solve_gui(self):
-        """
-        Solves the sudoku puzzle.
-        """
+        if self.session is not None:
+            self.session.reset()
 
-        self.reset()
-        start_i, start_j = self.next_loc(0, 0)
-        self.find_solution(start_i, start_j)
+        for i, j in self.geometry.locs:
+            self.current_matrix[i, j] = self.start_matrix[i, j]
+            self.squares[i][j].update_value(self.current_matrix[i, j])
+            self.squares[i][j].remove_border()
     
-    def find_solution(self, i, j):
+    def solve_gui(self, backend=constants.SOLVE_BACKEND):
         """
-        Recursive method using backtracking algorithm to solve the Sudoku puzzle and redraw the GUI at each step.
+        Solves the puzzle from the starting matrix, recording every number the solver sets, and starts replaying the
+        steps on the board. The solve runs at full speed; advance_replay then shows the steps from the frame loop.
 
         Arguments:
-            - i: current row of square to solve.
-            - j: current column of square to solve.
+            - backend: Solver backend to visualize, one of sudoku_solver.BACKENDS.
         """
+        self.reset()
 
-        # Base case
-        if 0 not in self.current_matrix:
-            # Only need to check full validity if no empty cells are present (like in case that Solver is passed a bad full matrix)
-            # Otherwise algorithm will ensure validity at all steps
-            return True
+        log = StepLog()
+        SudokuSolver(self.start_matrix, backend=backend, on_place=log.record).solve()
 
-        else:
-            num = 1
-            is_solution = False
-
-            while num < 10 and not is_solution:
-                # Check if num is valid in position (i,j)
-                if self.is_valid_element(num, i, j):
-                    self.current_matrix[i, j] = num
-                    
-                    self.select_square(i, j)
-                    if self.selected_square.is_correct < 0:
-                        self.check_square(i, j)
-
-                    self.update_square(num)
-                    pygame.display.update()
-
-                    # Sleep so it isn't solved too quickly
-                    sleep(0.02)
-                
-                    # Determine next position to fill
-                    next_i, next_j = self.next_loc(i, j)
-
-                    # Recursivly see if this leads to a solution.
-                    is_solution = self.find_solution(next_i, next_j)
-    
-                num += 1
+        self.replay_steps = log
+        self.replay_pos = 0
+        self.replay_credit = 0.0
 
-            # Reset to 0 (empty) if all numbers tried and no solution in this path
-            if not is_solution:
-                self.current_matrix[i, j] = 0
-                self.select_square(i, j)
-                self.update_square(0)
-                pygame.display.update()
+    def is_replaying(self):
+        """
+        Returns True while steps of a solve are still being replayed.
+        """
+        return self.replay_steps is not None
 
-                
-            return is_solution
+    def change_replay_speed(self, factor):
+        """
+        Multiplies the replay speed by factor, keeping it between 1 and constants.MAX_REPLAY_SPEED steps per second.
+        """
+        self.replay_speed = min(max(self.replay_speed * factor, 1), constants.MAX_REPLAY_SPEED)
 
-    def is_valid_element(self, num, row, col):
+    def advance_replay(self, seconds):
         """
-        Returns True if num is a valid entry in position (i, j). According to Sudoku rules, there can be no duplicates along a 
-        given row or column, and there must be no duplicates in each 3x3 submatrix.
-        Arguments:
-            - num: int. Number 1-9 to check
-            - row: int. Row number between 0 and 8
-            - col: int. Column number between 0 and 8
+        Shows the replay steps due after the given number of seconds, at replay_speed steps per second.
+        Returns True while steps remain.
         """
+        if self.replay_steps is None:
+            return False
 
-        # Check if duplicate in row 
-        for j in range(constants.COLS):
-            if j != col and self.current_matrix[row, j] == num:
-                return False
-        
-        # Check if duplicate in col
-        for i in range(constants.ROWS):
-            if i != row and self.current_matrix[i, col] == num:
-                return False
+        self.replay_credit += seconds * self.replay_speed
+
+        while self.replay_credit >= 1 and self.replay_pos < len(self.replay_steps):
+            self.show_step(*self.replay_steps[self.replay_pos])
+            self.replay_pos += 1
+            self.replay_credit -= 1
 
-        # Check if duplicate in submatrix
-        submatrix_loc = self.get_submatrix_coord(row, col)
+        if self.replay_pos == len(self.replay_steps):
+            self.replay_steps = None
 
-        for i in range(submatrix_loc[0], submatrix_loc[0] + 3):
-            for j in range(submatrix_loc[1], submatrix_loc[1] + 3):
-                if (i, j) != (row, col) and self.current_matrix[i, j] == num:
-                    return False
-                
-        return True
+        return self.replay_steps is not None
 
-    def get_submatrix_coord(self, row, col):
+    def finish_replay(self):
         """
-        Returns the coordinates of the top left element of the submatrix which contains row i and column j.
+        Shows every remaining replay step at once.
         """
-        row_start = (row // 3) * 3
-        col_start = (col // 3) * 3
+        if self.replay_steps is not None:
+            self.advance_replay(len(self.replay_steps) / self.replay_speed)
 
-        return (row_start, col_start)
-
-    def next_loc(self, i, j):
+    def show_step(self, row, col, num):
         """
-        Returns a tuple for the next empty location to check. Traversal order is left to right, then top to bottom. 
+        Shows one solver step: selects the square and enters num, checking it if it is not checked yet. num is 0 when
+        the solver emptied the square again.
         """
-        next_i, next_j = i, j
+        square = self.squares[row][col]
+
+        # The exact cover search also reports the starting values
+        if not square.can_write:
+            return
 
-        while next_i < 9 and next_j < 9 and self.current_matrix[next_i, next_j] != 0:
-            next_i = next_i if next_j < 8 else next_i + 1
-            next_j = next_j + 1 if next_j < 8 else 0
+        self.select_square(row, col)
 
-        return next_i, next_j
+        if num > 0 and square.is_correct < 0:
+            self.check_square(row, col)
 
+        self.update_square(num)
@@ -4,6 +4,15 @@ SQUARE_SIZE = (WIDTH - 4) // COLS # Subtract 4 to make up for thicker borders fo
 
 FPS = 60
 
+# Backend shown when the puzzle is solved with the space bar, and replay speed of its steps (steps per second).
+# The speed can be changed with the + and - keys while the solve is replayed.
+SOLVE_BACKEND = 'backtracking'
+REPLAY_SPEED = 50
+MAX_REPLAY_SPEED = 3200
+
+# Set to 'easy', 'medium' or 'hard' to play a newly generated puzzle instead of one of the built-in ones
+PUZZLE_DIFFICULTY = None
+
 # rgb
 RED = (255, 0, 0)
 GREEN = (132, 255, 51)
@@ -0,0 +1,284 @@
+import numpy as np
+from time import perf_counter
+from grid_tables import get_geometry
+
+class BudgetExceeded(Exception):
+    """
+    Raised by DLXSolver.solve when its node or time budget runs out, or it is cancelled, before the search finishes.
+    """
+
+
+class DLXSolver:
+    """
+    Solves a Sudoku matrix as an exact cover problem with Knuth's Algorithm X, using dancing links.
+
+    Each choice of digit d in location (i, j) is a row of the cover matrix, and each row covers four constraint
+    columns: (i, j) is filled, row i contains d, column j contains d and the box of (i, j) contains d. A solution is a
+    set of rows covering every column exactly once.
+    """
+
+    # Check the clock and cancellation only every this many nodes
+    CHECK_INTERVAL = 64
+
+    def __init__(self, matrix):
+        """
+        Arguments:
+            - matrix: Square numpy array with 0 for empty squares, such as the matrix of a SudokuSolver.
+        """
+        self.matrix = np.array(matrix, dtype=np.int32)
+        self.size = self.matrix.shape[0]
+        self.box_size = int(round(self.size ** 0.5))
+        self.geometry = get_geometry(self.box_size)
+        self.build_links()
+
+    def build_links(self):
+        """
+        Builds the sparse cover matrix as circular doubly linked lists stored in flat arrays. Node 0 is the root,
+        nodes 1 to 4 * size^2 are the column headers and the remaining nodes are the 1s of the cover matrix.
+        Only digits which do not clash with the starting values are added as rows.
+        """
+        size = self.size
+        area = size * size
+        num_cols = 4 * area
+
+        # Headers are linked left/right in a ring through the root, and each starts with an empty up/down ring
+        self.left = [num_cols] + list(range(num_cols))
+        self.right = list(range(1, num_cols + 1)) + [0]
+        self.up = list(range(num_cols + 1))
+        self.down = list(range(num_cols + 1))
+        self.col = list(range(num_cols + 1))
+        self.col_size = [0] * (num_cols + 1)
+        self.row_id = [-1] * (num_cols + 1)
+
+        # Digits already used in each unit. Units are numbered rows, then columns, then boxes, which is also the
+        # order of their constraint columns, so digit d of unit u is column area + u * size + d.
+        units_of = self.geometry.units_of
+        values = self.matrix.ravel().tolist()
+        used = [set() for _ in range(3 * size)]
+
+        for cell, num in enumerate(values):
+            if num > 0:
+                for unit in units_of[cell]:
+                    used[unit].add(num)
+
+        for cell, given in enumerate(values):
+            row, col, box = units_of[cell]
+            row_used, col_used, box_used = used[row], used[col], used[box]
+
+            for num in range(1, size + 1):
+                if given > 0 and num != given:
+                    continue
+
+                if given == 0 and (num in row_used or num in col_used or num in box_used):
+                    continue
+
+                d = num - 1
+                columns = (cell, area + row * size + d, area + col * size + d, area + box * size + d)
+                self.add_row(cell * size + d, columns)
+
+    def add_row(self, row_id, columns):
+        """
+        Appends a row of the cover matrix with a 1 in each of the given columns (numbered from 0).
+        """
+        first = len(self.col)
+
+        for k, column in enumerate(columns):
+            header = column + 1
+            node = first + k
+
+            # Insert at the bottom of the column
+            self.col.append(header)
+            self.row_id.append(row_id)
+            self.up.append(self.up[header])
+            self.down.append(header)
+            self.down[self.up[header]] = node
+            self.up[header] = node
+            self.col_size[header] += 1
+
+            # Link into the row ring
+            self.left.append(first + (k - 1) % len(columns))
+            self.right.append(first + (k + 1) % len(columns))
+
+    def cover(self, header):
+        """
+        Removes a column from the header list, and every row with a 1 in that column from the other columns.
+        """
+        left, right, up, down, col, col_size = self.left, self.right, self.up, self.down, self.col, self.col_size
+
+        right[left[header]] = right[header]
+        left[right[header]] = left[header]
+
+        i = down[header]
+        while i != header:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                col_size[col[j]] -= 1
+                j = right[j]
+            i = down[i]
+
+    def uncover(self, header):
+        """
+        Undoes cover, relinking nodes in exactly the reverse order they were removed.
+        """
+        left, right, up, down, col, col_size = self.left, self.right, self.up, self.down, self.col, self.col_size
+
+        i = up[header]
+        while i != header:
+            j = left[i]
+            while j != i:
+                col_size[col[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+
+        right[left[header]] = header
+        left[right[header]] = header
+
+    def search(self, chosen):
+        """
+        Algorithm X with an explicit stack instead of recursion, so its depth is not limited by Python's recursion limit
+        on large grids. Always branches on the column with the fewest remaining rows.
+        Appends the ids of the selected rows to chosen, and returns True if an exact cover is found.
+        """
+        left, right, down, col, col_size = self.left, self.right, self.down, self.col, self.col_size
+        row_id = self.row_id
+
+        # Each frame is [covered column, row of it being tried (the column itself before the first), whether the
+        # column had more than one row, so that every row tried in it is a guess]
+        stack = []
+
+        while True:
+            if right[0] == 0:
+                return True
+
+            header = right[0]
+            best = header
+            while header != 0:
+                if col_size[header] < col_size[best]:
+                    best = header
+
+                    if col_size[best] <= 1:
+                        break
+
+                header = right[header]
+
+            # A column no row can cover is a dead end, and the row tried in the frame below is given up
+            if col_size[best] > 0:
+                stack.append([best, best, col_size[best] > 1])
+                self.cover(best)
+
+            # Move the top frame on to its next row, dropping frames whose column has no rows left to try
+            while stack:
+                frame = stack[-1]
+                best, i, branching = frame
+
+                if i != best:
+                    chosen.pop()
+                    self.backtracks += 1
+
+                    if self.on_place is not None:
+                        self.report(row_id[i], False)
+
+                    j = left[i]
+                    while j != i:
+                        self.uncover(col[j])
+                        j = left[j]
+
+                i = down[i]
+
+                if i != best:
+                    break
+
+                self.uncover(best)
+                stack.pop()
+
+            if not stack:
+                return False
+
+            frame[1] = i
+            self.nodes += 1
+
+            if branching:
+                self.guesses += 1
+
+            if self.nodes >= self.next_check:
+                self.check_budget()
+
+            chosen.append(row_id[i])
+
+            if len(chosen) > self.max_depth:
+                self.max_depth = len(chosen)
+
+            if self.on_place is not None:
+                self.report(row_id[i], True)
+
+            j = right[i]
+            while j != i:
+                self.cover(col[j])
+                j = right[j]
+
+    def report(self, row_id, placed):
+        """
+        Calls on_place for a cover row which was chosen (placed is True) or given up by the search.
+        """
+        cell, d = divmod(row_id, self.size)
+        self.on_place(cell // self.size, cell % self.size, d + 1 if placed else 0)
+
+    def check_budget(self):
+        """
+        Raises BudgetExceeded if a limit given to solve has been reached, otherwise schedules the next check.
+        """
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise BudgetExceeded()
+
+        if self.deadline is not None and perf_counter() >= self.deadline:
+            raise BudgetExceeded()
+
+        if self.cancel is not None and self.cancel.cancelled:
+            raise BudgetExceeded()
+
+        self.next_check = self.nodes + self.CHECK_INTERVAL
+
+        if self.max_nodes is not None:
+            self.next_check = min(self.next_check, self.max_nodes + 1)
+
+    def solve(self, max_nodes=None, time_limit=None, cancel=None, on_place=None):
+        """
+        Returns the solution as a numpy array, or None if the matrix has no solution.
+        Raises BudgetExceeded if a limit is reached first. The solver cannot be used again after that.
+        Afterwards nodes holds the number of rows tried, guesses those tried while their column had other rows left,
+        backtracks the rows given up and max_depth the most rows chosen at once (starting values included).
+
+        Arguments:
+            - max_nodes: Maximum number of rows to try. No limit if None.
+            - time_limit: Maximum number of seconds to search. No limit if None.
+            - cancel: Optional object whose cancelled attribute stops the search once it is True, such as a
+              CancelToken from sudoku_solver.py.
+            - on_place: Optional function called as on_place(row, col, num) each time the search chooses a digit for a
+              location, and with num 0 when it gives the choice up again.
+        """
+        self.nodes = 0
+        self.guesses = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.max_nodes = max_nodes
+        self.deadline = None if time_limit is None else perf_counter() + time_limit
+        self.cancel = cancel
+        self.on_place = on_place
+        limited = max_nodes is not None or time_limit is not None or cancel is not None
+        self.next_check = 0 if limited else float('inf')
+        chosen = []
+
+        if not self.search(chosen):
+            return None
+
+        solution = np.zeros_like(self.matrix)
+
+        for row_id in chosen:
+            cell, d = divmod(row_id, self.size)
+            solution[cell // self.size, cell % self.size] = d + 1
+
+        return solution
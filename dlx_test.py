@@ -0,0 +1,70 @@
+from dlx import DLXSolver, BudgetExceeded
+import numpy as np
+import pytest
+
+class TestDLXSolver:
+
+    def setup_method(self):
+        self.test_matrix = np.array([[0, 0, 0, 0, 0, 3, 0, 2, 7],
+                                    [1, 0, 0, 0, 0, 4, 6, 0, 3],
+                                    [0, 0, 0, 6, 0, 0, 0, 1, 0],
+                                    [6, 8, 5, 0, 7, 0, 1, 3, 2],
+                                    [7, 0, 0, 1, 6, 0, 5, 0, 8],
+                                    [0, 1, 9, 5, 0, 0, 0, 0, 4],
+                                    [9, 0, 0, 0, 4, 0, 0, 7, 1],
+                                    [0, 0, 0, 7, 2, 6, 0, 0, 0],
+                                    [0, 7, 3, 8, 9, 1, 0, 5, 0]])
+
+        self.correct_solution = np.array([[5, 6, 8, 9, 1, 3, 4, 2, 7],
+                                    [1, 9, 7, 2, 5, 4, 6, 8, 3],
+                                    [3, 4, 2, 6, 8, 7, 9, 1, 5],
+                                    [6, 8, 5, 4, 7, 9, 1, 3, 2],
+                                    [7, 3, 4, 1, 6, 2, 5, 9, 8],
+                                    [2, 1, 9, 5, 3, 8, 7, 6, 4],
+                                    [9, 2, 6, 3, 4, 5, 8, 7, 1],
+                                    [8, 5, 1, 7, 2, 6, 3, 4, 9],
+                                    [4, 7, 3, 8, 9, 1, 2, 5, 6]])
+
+    def test_correct_solution(self):
+        assert np.array_equal(DLXSolver(self.test_matrix).solve(), self.correct_solution)
+
+    def test_only_consistent_rows_are_built(self):
+        # 38 starting values plus one row per candidate digit of each empty location
+        dlx = DLXSolver(self.test_matrix)
+        num_rows = (len(dlx.col) - 325) // 4
+
+        assert num_rows == 38 + 106
+
+    def test_hard_puzzle(self):
+        hard = np.array([int(c) for c in
+                        "800000000003600000070090200050007000000045700000100030001000068008500010090000400"]).reshape(9, 9)
+        solution = DLXSolver(hard).solve()
+
+        assert np.array_equal(solution[hard > 0], hard[hard > 0])
+        assert all(sorted(solution[i, :]) == list(range(1, 10)) for i in range(9))
+        assert all(sorted(solution[:, j]) == list(range(1, 10)) for j in range(9))
+
+    def test_empty_matrix(self):
+        solution = DLXSolver(np.zeros((9, 9))).solve()
+
+        assert solution is not None and 0 not in solution
+
+    def test_no_solution_with_duplicate_starting_values(self):
+        assert DLXSolver(np.ones((9, 9))).solve() is None
+
+    def test_correct_filled_matrix(self):
+        assert np.array_equal(DLXSolver(self.correct_solution).solve(), self.correct_solution)
+
+    def test_no_solution_with_clashing_starting_value(self):
+        # 4 is already in column 8
+        unsolvable = np.copy(self.test_matrix)
+        unsolvable[0, 8] = 4
+
+        assert DLXSolver(unsolvable).solve() is None
+
+    def test_max_nodes_exceeded(self):
+        with pytest.raises(BudgetExceeded):
+            DLXSolver(np.zeros((9, 9))).solve(max_nodes=10)
+
+    def test_max_nodes_enough(self):
+        assert np.array_equal(DLXSolver(self.test_matrix).solve(max_nodes=1000), self.correct_solution)
@@ -0,0 +1,70 @@
+import pygame
+import constants
+
+# Text styles used on the board: font name, font size and color
+STYLES = {
+    'initial': ('verdana', 70, constants.BLACK),
+    'entered': ('calibri', 75, constants.BLACK),
+    'banner': ('calibri', 150, constants.PINK),
+}
+
+class GlyphAtlas:
+    """
+    Loads each font once and renders the digits 1-9 once per style, so drawing a number is a single blit of a stored
+    surface. Use get_atlas to share one atlas between every square and the board.
+    """
+
+    def __init__(self):
+        pygame.font.init()
+
+        # (font name, size) -> Font
+        self.fonts = {}
+        # style -> list of surfaces indexed by digit (index 0 is None)
+        self.digits = {}
+        # (text, style) -> surface
+        self.texts = {}
+
+        for style in STYLES:
+            font = self.get_font(style)
+            color = STYLES[style][2]
+            self.digits[style] = [None] + [font.render(str(num), 1, color) for num in range(1, 10)]
+
+    def get_font(self, style):
+        """
+        Returns the font of a style, loading it the first time it is needed.
+        """
+        name, size, _ = STYLES[style]
+
+        if (name, size) not in self.fonts:
+            self.fonts[name, size] = pygame.font.SysFont(name, size)
+
+        return self.fonts[name, size]
+
+    def get_digit(self, style, num):
+        """
+        Returns the surface for digit num (1-9) drawn in a style.
+        """
+        return self.digits[style][num]
+
+    def get_text(self, text, style):
+        """
+        Returns the surface for a piece of text drawn in a style, rendering it the first time it is needed.
+        """
+        if (text, style) not in self.texts:
+            self.texts[text, style] = self.get_font(style).render(text, 1, STYLES[style][2])
+
+        return self.texts[text, style]
+
+
+ATLAS = None
+
+def get_atlas():
+    """
+    Returns the shared GlyphAtlas, building it on first use. pygame must be initialised first.
+    """
+    global ATLAS
+
+    if ATLAS is None:
+        ATLAS = GlyphAtlas()
+
+    return ATLAS
@@ -0,0 +1,74 @@
+# Largest number of digits for which candidate counts are read from a precomputed table of 2^(digits + 1) entries.
+# Bigger grids count the bits of each mask instead.
+MAX_TABLE_DIGITS = 16
+
+class BitCounter:
+    """
+    Stands in for a candidate count table when masks are too wide to tabulate: bit_counter[mask] counts the set bits.
+    """
+
+    def __getitem__(self, mask):
+        return bin(mask).count('1')
+
+
+class Geometry:
+    """
+    Lookup tables for a grid of box_size x box_size boxes, which has box_size^2 rows, columns and digits. Cells are
+    numbered left to right, then top to bottom, and units (the rows, columns and boxes which must each contain every
+    digit once) are numbered rows first, then columns, then boxes. Use get_geometry so that each box size is only
+    built once.
+    """
+
+    def __init__(self, box_size):
+        size = box_size * box_size
+        self.box_size = box_size
+        self.size = size
+        self.num_cells = size * size
+
+        # Bit n is set when digit n is present, so a full row, column or box has bits 1 to size set
+        self.all_digits = ((1 << size) - 1) << 1
+
+        # Row, column, box and (row, column) location of each cell
+        self.row_of = [cell // size for cell in range(self.num_cells)]
+        self.col_of = [cell % size for cell in range(self.num_cells)]
+        self.box_of = [(i // box_size) * box_size + j // box_size for i, j in zip(self.row_of, self.col_of)]
+        self.locs = list(zip(self.row_of, self.col_of))
+
+        # Cells in each unit, and the (row, column, box) unit numbers of each cell
+        self.units = ([[cell for cell in range(self.num_cells) if self.row_of[cell] == k] for k in range(size)] +
+                      [[cell for cell in range(self.num_cells) if self.col_of[cell] == k] for k in range(size)] +
+                      [[cell for cell in range(self.num_cells) if self.box_of[cell] == k] for k in range(size)])
+        self.units_of = [(self.row_of[cell], size + self.col_of[cell], 2 * size + self.box_of[cell])
+                         for cell in range(self.num_cells)]
+
+        # Other cells sharing a unit with each cell, in order (20 for a 9x9 grid)
+        self.peers = [sorted(set(self.units[row] + self.units[col] + self.units[box]) - {cell})
+                      for cell, (row, col, box) in enumerate(self.units_of)]
+
+        # Number of candidate digits in each possible mask
+        if size <= MAX_TABLE_DIGITS:
+            self.popcount = [bin(mask).count('1') for mask in range(self.all_digits + 1)]
+
+        else:
+            self.popcount = BitCounter()
+
+
+# Tables of the standard 9x9 grid are built on import, other sizes on first use
+GEOMETRIES = {3: Geometry(3)}
+
+def get_geometry(box_size):
+    """
+    Returns the Geometry for the given box size, building it on first use.
+    """
+    if box_size not in GEOMETRIES:
+        GEOMETRIES[box_size] = Geometry(box_size)
+
+    return GEOMETRIES[box_size]
+
+def get_box_size(size):
+    """
+    Returns the box size of a grid with size rows, or None if size is not a square number.
+    """
+    box_size = int(round(size ** 0.5))
+
+    return box_size if box_size > 0 and box_size * box_size == size else None
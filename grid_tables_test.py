@@ -0,0 +1,42 @@
+from grid_tables import Geometry, GEOMETRIES, get_geometry, get_box_size
+
+class TestGeometry:
+
+    def setup_method(self):
+        self.geometry = get_geometry(3)
+
+    def test_9x9_built_on_import(self):
+        assert GEOMETRIES[3] is self.geometry
+
+    def test_units_of(self):
+        # Row 4, column 7 and box 5 are units 4, 9 + 7 and 18 + 5
+        assert self.geometry.units_of[4 * 9 + 7] == (4, 16, 23)
+
+        for cell in range(self.geometry.num_cells):
+            for unit in self.geometry.units_of[cell]:
+                assert cell in self.geometry.units[unit]
+
+    def test_peers(self):
+        geometry = self.geometry
+
+        for cell in range(geometry.num_cells):
+            peers = geometry.peers[cell]
+            assert len(peers) == 20
+            assert cell not in peers
+
+            for peer in peers:
+                assert (geometry.row_of[peer] == geometry.row_of[cell] or geometry.col_of[peer] == geometry.col_of[cell]
+                        or geometry.box_of[peer] == geometry.box_of[cell])
+
+        assert geometry.peers[0] == [1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 18, 19, 20, 27, 36, 45, 54, 63, 72]
+
+    def test_larger_grid(self):
+        geometry = Geometry(4)
+
+        assert len(geometry.units) == 48
+        assert all(len(peers) == 3 * 15 - 2 * 3 for peers in geometry.peers)
+
+    def test_get_box_size(self):
+        assert get_box_size(9) == 3
+        assert get_box_size(16) == 4
+        assert get_box_size(10) is None
@@ -3,6 +3,7 @@ import constants
 import numpy as np
 from board import Board
 from random import choice
+from puzzle_generator import generate
 
 def main():
     """
@@ -15,19 +16,31 @@ def main():
     run = True
     freeze = False
     clock = pygame.time.Clock()
-    matrix = get_start_matrix()
+    matrix = get_start_matrix(constants.PUZZLE_DIFFICULTY)
     board = Board(WIN, matrix)
     
 
     # Event loop
     while run:
-        clock.tick(constants.FPS)
+        seconds = clock.tick(constants.FPS) / 1000
         
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 run = False
 
-            if not freeze:
+            # While a solve is replayed, only its speed can be changed, or space pressed again to skip to the end
+            if board.is_replaying():
+                if event.type == pygame.KEYDOWN:
+                    if event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                        board.change_replay_speed(2)
+
+                    elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                        board.change_replay_speed(0.5)
+
+                    elif event.key == pygame.K_SPACE:
+                        board.finish_replay()
+
+            elif not freeze:
                 if event.type == pygame.KEYDOWN:
 
                     # Update square values
@@ -95,20 +108,30 @@ def main():
                         row, column = board.get_clicked_square(pos)
                         board.check_square(row, column)
 
-        pygame.display.update()
+        board.poll_solver()
+        board.advance_replay(seconds)
 
-        if np.array_equal(board.solution, board.current_matrix):
+        if not freeze and board.is_solved():
             board.solved()
             freeze = True
 
+        # Only the parts of the window which changed are sent to the display
+        board.update_display()
+
 
     pygame.quit()
 
 
-def get_start_matrix():
+def get_start_matrix(difficulty=None):
     """
     Returns the starting Sudoku matrix where 0 represents empty square.
+
+    Arguments:
+        - difficulty: If given, a new puzzle of this difficulty ('easy', 'medium' or 'hard') is generated. Otherwise one
+          of the built-in puzzles is picked at random.
     """
+    if difficulty is not None:
+        return generate(difficulty=difficulty)
 
     mat_list = []
     mat_list.append(np.array([[0, 0, 0, 0, 0, 3, 0, 2, 7],
@@ -0,0 +1,190 @@
+import sys
+import struct
+import numpy as np
+from itertools import islice
+
+# File layout: a 16 byte header followed by fixed size records, one per puzzle.
+# Header: magic, format version, cell encoding, box size, 1 padding byte, number of puzzles (little endian uint64).
+HEADER = struct.Struct('<4sBBBxQ')
+MAGIC = b'SDKC'
+VERSION = 1
+
+# Cell encodings:
+#   - NIBBLE: 4 bits per cell, two cells per byte (first cell in the high bits), 41 bytes per 9x9 puzzle
+#   - BYTE: 1 byte per cell, 81 bytes per 9x9 puzzle. Records can be read as numpy views without any decoding.
+NIBBLE = 0
+BYTE = 1
+ENCODINGS = {'nibble': NIBBLE, 'byte': BYTE}
+
+def record_size(encoding):
+    """
+    Returns the number of bytes used to store one 9x9 puzzle with the given encoding.
+    """
+    return 41 if encoding == NIBBLE else 81
+
+def pack(puzzles, encoding):
+    """
+    Returns the records for an (N, 9, 9) array of puzzles as an (N, record_size) uint8 array.
+    """
+    cells = np.asarray(puzzles, dtype=np.uint8).reshape(-1, 81)
+
+    if encoding == BYTE:
+        return cells
+
+    # Pad to an even number of cells, then put each pair of cells in one byte
+    pairs = np.zeros((len(cells), 82), dtype=np.uint8)
+    pairs[:, :81] = cells
+    pairs = pairs.reshape(-1, 41, 2)
+
+    return (pairs[:, :, 0] << 4) | pairs[:, :, 1]
+
+def unpack(records, encoding):
+    """
+    Returns an (N, 9, 9) uint8 array of puzzles for an (N, record_size) array of records. For the BYTE encoding this
+    is a view of records, without copying.
+    """
+    if encoding == BYTE:
+        return records.reshape(-1, 9, 9)
+
+    cells = np.empty((len(records), 82), dtype=np.uint8)
+    cells[:, 0::2] = records >> 4
+    cells[:, 1::2] = records & 0x0F
+
+    return cells[:, :81].reshape(-1, 9, 9)
+
+
+class CorpusWriter:
+    """
+    Writes puzzles to a new corpus file. The puzzle count in the header is filled in when the writer is closed.
+    """
+
+    def __init__(self, path, encoding='nibble'):
+        """
+        Arguments:
+            - path: File to create. An existing file is overwritten.
+            - encoding: 'nibble' for the smallest files, or 'byte' for records which can be read without decoding.
+        """
+        if encoding not in ENCODINGS:
+            raise ValueError("encoding must be one of {}".format(tuple(ENCODINGS)))
+
+        self.encoding = ENCODINGS[encoding]
+        self.count = 0
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.encoding, 3, 0))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, matrix):
+        """
+        Appends one 9x9 puzzle, with 0 for empty squares.
+        """
+        self.write_many(np.asarray(matrix).reshape(1, 9, 9))
+
+    def write_many(self, puzzles):
+        """
+        Appends an (N, 9, 9) array of puzzles.
+        """
+        puzzles = np.asarray(puzzles)
+
+        if puzzles.ndim != 3 or puzzles.shape[1:] != (9, 9):
+            raise ValueError("puzzles must have shape (N, 9, 9)")
+
+        if ((puzzles < 0) | (puzzles > 9)).any():
+            raise ValueError("puzzles must only contain numbers 0 to 9")
+
+        self.file.write(pack(puzzles, self.encoding).tobytes())
+        self.count += len(puzzles)
+
+    def close(self):
+        """
+        Writes the final puzzle count into the header and closes the file.
+        """
+        if not self.file.closed:
+            self.file.seek(0)
+            self.file.write(HEADER.pack(MAGIC, VERSION, self.encoding, 3, self.count))
+            self.file.close()
+
+
+class Corpus:
+    """
+    Read-only, memory-mapped view of a corpus file. Opening is instant regardless of file size, any puzzle can be
+    read directly by index, and processes reading the same file share its pages through the operating system.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+
+        if len(header) < HEADER.size:
+            raise ValueError("{} is not a puzzle corpus".format(path))
+
+        magic, version, self.encoding, box_size, count = HEADER.unpack(header)
+
+        if magic != MAGIC or version != VERSION or self.encoding not in (NIBBLE, BYTE) or box_size != 3:
+            raise ValueError("{} is not a supported puzzle corpus".format(path))
+
+        self.path = path
+
+        if count == 0:
+            self.records = np.zeros((0, record_size(self.encoding)), dtype=np.uint8)
+
+        else:
+            self.records = np.memmap(path, dtype=np.uint8, mode='r', offset=HEADER.size,
+                                     shape=(count, record_size(self.encoding)))
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, n):
+        """
+        Returns puzzle n as a 9x9 uint8 array. For the BYTE encoding this is a view of the mapped file.
+        """
+        if n < 0:
+            n += len(self)
+
+        if not 0 <= n < len(self):
+            raise IndexError("puzzle index out of range")
+
+        return unpack(self.records[n:n + 1], self.encoding)[0]
+
+    def __iter__(self):
+        for start in range(0, len(self), 4096):
+            yield from self.get_batch(start, start + 4096)
+
+    def get_batch(self, start, stop):
+        """
+        Returns puzzles start to stop - 1 as an (N, 9, 9) uint8 array, for example to pass to solve_many.
+        For the BYTE encoding this is a view of the mapped file.
+        """
+        return unpack(self.records[start:stop], self.encoding)
+
+
+def write_corpus(path, puzzles, encoding='nibble'):
+    """
+    Writes an iterable of 9x9 puzzles to a new corpus file and returns the number written.
+    """
+    puzzles = iter(puzzles)
+
+    with CorpusWriter(path, encoding) as writer:
+        chunk = list(islice(puzzles, 4096))
+
+        while chunk:
+            writer.write_many(np.array(chunk))
+            chunk = list(islice(puzzles, 4096))
+
+    return writer.count
+
+
+if __name__ == '__main__':
+    # Converts a text file of 81 character puzzle lines to a corpus: python puzzle_corpus.py puzzles.txt corpus.sdk
+    from solve_file import read_puzzles, MALFORMED
+
+    with open(sys.argv[1]) as infile:
+        puzzles = (puzzle for puzzle in read_puzzles(infile, sys.stderr) if puzzle is not MALFORMED)
+        count = write_corpus(sys.argv[2], puzzles)
+
+    print("wrote {} puzzles".format(count))
@@ -0,0 +1,88 @@
+from puzzle_corpus import CorpusWriter, Corpus, write_corpus, pack, unpack, NIBBLE, BYTE, HEADER
+from sudoku_solver import solve_many
+import numpy as np
+import pytest
+
+class TestPuzzleCorpus:
+
+    def setup_method(self):
+        self.test_matrix = np.array([[0, 0, 0, 0, 0, 3, 0, 2, 7],
+                                    [1, 0, 0, 0, 0, 4, 6, 0, 3],
+                                    [0, 0, 0, 6, 0, 0, 0, 1, 0],
+                                    [6, 8, 5, 0, 7, 0, 1, 3, 2],
+                                    [7, 0, 0, 1, 6, 0, 5, 0, 8],
+                                    [0, 1, 9, 5, 0, 0, 0, 0, 4],
+                                    [9, 0, 0, 0, 4, 0, 0, 7, 1],
+                                    [0, 0, 0, 7, 2, 6, 0, 0, 0],
+                                    [0, 7, 3, 8, 9, 1, 0, 5, 0]])
+
+        self.puzzles = np.stack([np.roll(self.test_matrix, n, axis=1) for n in range(5)])
+
+    @pytest.mark.parametrize('encoding', [NIBBLE, BYTE])
+    def test_pack_unpack(self, encoding):
+        assert np.array_equal(unpack(pack(self.puzzles, encoding), encoding), self.puzzles)
+
+    def test_nibble_record_size(self):
+        assert pack(self.puzzles, NIBBLE).shape == (5, 41)
+
+    @pytest.mark.parametrize('encoding', ['nibble', 'byte'])
+    def test_write_and_read(self, tmp_path, encoding):
+        path = str(tmp_path / 'corpus.sdk')
+
+        with CorpusWriter(path, encoding) as writer:
+            writer.write(self.puzzles[0])
+            writer.write_many(self.puzzles[1:])
+
+        corpus = Corpus(path)
+
+        assert len(corpus) == 5
+        assert np.array_equal(corpus[3], self.puzzles[3])
+        assert np.array_equal(corpus[-1], self.puzzles[4])
+        assert np.array_equal(corpus.get_batch(1, 4), self.puzzles[1:4])
+        assert np.array_equal(np.array(list(corpus)), self.puzzles)
+
+    def test_byte_encoding_is_zero_copy(self, tmp_path):
+        path = str(tmp_path / 'corpus.sdk')
+        write_corpus(path, self.puzzles, 'byte')
+        corpus = Corpus(path)
+
+        assert np.shares_memory(corpus[2], corpus.records)
+        assert np.shares_memory(corpus.get_batch(0, 5), corpus.records)
+
+    def test_file_size(self, tmp_path):
+        path = tmp_path / 'corpus.sdk'
+        write_corpus(str(path), self.puzzles)
+
+        assert path.stat().st_size == HEADER.size + 5 * 41
+
+    def test_solve_batch_from_corpus(self, tmp_path):
+        path = str(tmp_path / 'corpus.sdk')
+        write_corpus(path, self.puzzles[:1])
+        solutions, solved = solve_many(Corpus(path).get_batch(0, 1))
+
+        assert solved[0] and solutions[0, 0, 0] == 5
+
+    def test_empty_corpus(self, tmp_path):
+        path = str(tmp_path / 'corpus.sdk')
+        write_corpus(path, [])
+
+        assert len(Corpus(path)) == 0
+
+    def test_index_out_of_range(self, tmp_path):
+        path = str(tmp_path / 'corpus.sdk')
+        write_corpus(path, self.puzzles)
+
+        with pytest.raises(IndexError):
+            Corpus(path)[5]
+
+    def test_not_a_corpus(self, tmp_path):
+        path = tmp_path / 'puzzles.txt'
+        path.write_text('0' * 81 + '\n')
+
+        with pytest.raises(ValueError):
+            Corpus(str(path))
+
+    def test_invalid_nums_throws_exception(self, tmp_path):
+        with CorpusWriter(str(tmp_path / 'corpus.sdk')) as writer:
+            with pytest.raises(ValueError):
+                writer.write(np.full((9, 9), 10))
@@ -0,0 +1,134 @@
+import os
+import numpy as np
+from multiprocessing import Pool
+from sudoku_solver import SudokuSolver
+
+# Ranges of search steps (digits tried after propagation) needed by the default solver for each difficulty.
+# Easy puzzles can be solved by filling naked and hidden singles alone.
+DIFFICULTIES = {
+    'easy': (0, 0),
+    'medium': (1, 5),
+    'hard': (6, None),
+}
+
+# Fewest starting values a 9x9 puzzle with a unique solution can have. Digging stops there at the latest.
+MIN_CLUES = 17
+
+# Fewest starting values generate can be asked for. Removing values at random gets stuck well above MIN_CLUES: of 6400
+# random grids, 3.5% were dug down to 22 values or fewer, 0.2% to 21 and none below, so lower targets would use up every
+# attempt. From 23 about one grid in five is enough.
+MIN_GENERATED_CLUES = 23
+
+def rate(puzzle):
+    """
+    Returns the number of search steps the default solver needs for the puzzle, which measures how much guessing it
+    takes. 0 means it is solved by propagation alone.
+    """
+    solver = SudokuSolver(puzzle)
+    search = solver.start_search()
+    search.run()
+
+    return search.steps
+
+def get_difficulty(puzzle):
+    """
+    Returns the name of the difficulty band (see DIFFICULTIES) the puzzle falls in.
+    """
+    steps = rate(puzzle)
+
+    for name, (low, high) in DIFFICULTIES.items():
+        if steps >= low and (high is None or steps <= high):
+            return name
+
+def random_solution(rng):
+    """
+    Returns a random complete 9x9 grid. The three boxes on the diagonal are independent of each other, so they are
+    filled with random permutations before the rest is solved.
+    """
+    matrix = np.zeros((9, 9), dtype=np.int32)
+
+    for k in range(3):
+        matrix[3 * k:3 * k + 3, 3 * k:3 * k + 3] = rng.permutation(9).reshape(3, 3) + 1
+
+    return SudokuSolver(matrix).solve()
+
+def dig(solution, rng, clues=MIN_CLUES, difficulty=None):
+    """
+    Removes values from a complete grid in random order, keeping each removal only if the puzzle still has a unique
+    solution (and, when difficulty is 'easy', can still be solved by propagation alone). Stops once only clues values
+    remain or no more can be removed.
+    """
+    puzzle = np.copy(solution)
+    solver = SudokuSolver(puzzle)
+    remaining = 81
+
+    for cell in rng.permutation(81):
+        if remaining <= clues:
+            break
+
+        i, j = divmod(int(cell), 9)
+        value = puzzle[i, j]
+        puzzle[i, j] = 0
+
+        # Counting solutions leaves the matrix unchanged, so the solver can work on the puzzle itself
+        solver.load_matrix(puzzle)
+
+        if solver.has_unique_solution() and (difficulty != 'easy' or rate(puzzle) == 0):
+            remaining -= 1
+
+        else:
+            puzzle[i, j] = value
+
+    return puzzle
+
+def generate(clues=None, difficulty=None, rng=None, max_attempts=100):
+    """
+    Returns a new 9x9 puzzle with a unique solution, as an int32 array with 0 for empty squares.
+
+    Arguments:
+        - clues: Number of starting values wanted, from MIN_GENERATED_CLUES to 81. If None, as many values as
+          possible are removed, which usually leaves 22 to 26.
+        - difficulty: Optional difficulty band the puzzle must fall in, one of DIFFICULTIES.
+        - rng: numpy random Generator to draw from. A new unseeded one is used if None.
+        - max_attempts: Number of random grids to try before giving up with a RuntimeError. Removing values at random
+          can get stuck above a low clue count, so several grids may be needed.
+    """
+    if clues is not None and not MIN_GENERATED_CLUES <= clues <= 81:
+        raise ValueError("clues must be between {} and 81: removing values at random rarely gets below {}".format(
+            MIN_GENERATED_CLUES, MIN_GENERATED_CLUES))
+
+    if difficulty is not None and difficulty not in DIFFICULTIES:
+        raise ValueError("difficulty must be one of {}".format(tuple(DIFFICULTIES)))
+
+    rng = np.random.default_rng() if rng is None else rng
+
+    for _ in range(max_attempts):
+        puzzle = dig(random_solution(rng), rng, MIN_CLUES if clues is None else clues, difficulty)
+
+        if clues is not None and np.count_nonzero(puzzle) != clues:
+            continue
+
+        if difficulty is None or get_difficulty(puzzle) == difficulty:
+            return puzzle
+
+    raise RuntimeError("no puzzle found in {} attempts".format(max_attempts))
+
+def generate_seeded(args):
+    """
+    Worker function for generate_many: generates one puzzle from a seed.
+    """
+    seed, clues, difficulty = args
+
+    return generate(clues, difficulty, np.random.default_rng(seed))
+
+def generate_many(count, clues=None, difficulty=None, workers=None, seed=None):
+    """
+    Generates count puzzles in parallel over a pool of worker processes, yielding each as soon as it is ready.
+    Arguments are as for generate, plus the number of worker processes (defaults to the number of CPU cores) and an
+    optional seed which makes the whole set reproducible.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(count)
+    tasks = ((child, clues, difficulty) for child in seeds)
+
+    with Pool(workers or os.cpu_count() or 1) as pool:
+        yield from pool.imap(generate_seeded, tasks)
@@ -0,0 +1,68 @@
+from puzzle_generator import generate, generate_many, random_solution, dig, get_difficulty, rate, MIN_GENERATED_CLUES
+from sudoku_solver import SudokuSolver
+import numpy as np
+import pytest
+
+class TestPuzzleGenerator:
+
+    def setup_method(self):
+        self.rng = np.random.default_rng(2020)
+
+    def test_random_solution_is_complete_and_valid(self):
+        solver = SudokuSolver(random_solution(self.rng))
+
+        assert solver.is_final_solution()
+
+    def test_dig_keeps_unique_solution(self):
+        solution = random_solution(self.rng)
+        puzzle = dig(solution, self.rng, clues=30)
+
+        assert np.count_nonzero(puzzle) == 30
+        assert np.array_equal(puzzle[puzzle > 0], solution[puzzle > 0])
+        assert SudokuSolver(puzzle).has_unique_solution()
+
+    def test_generate_clues(self):
+        puzzle = generate(clues=28, rng=self.rng)
+
+        assert np.count_nonzero(puzzle) == 28
+        assert SudokuSolver(puzzle).has_unique_solution()
+
+    @pytest.mark.parametrize('difficulty', ['easy', 'medium'])
+    def test_generate_difficulty(self, difficulty):
+        puzzle = generate(difficulty=difficulty, rng=self.rng)
+
+        assert get_difficulty(puzzle) == difficulty
+        assert SudokuSolver(puzzle).has_unique_solution()
+
+    def test_easy_puzzle_needs_no_guessing(self):
+        assert rate(generate(difficulty='easy', rng=self.rng)) == 0
+
+    def test_generate_is_reproducible(self):
+        first = generate(clues=30, rng=np.random.default_rng(7))
+        second = generate(clues=30, rng=np.random.default_rng(7))
+
+        assert np.array_equal(first, second)
+
+    def test_generate_fewest_clues(self):
+        puzzle = generate(clues=MIN_GENERATED_CLUES, rng=np.random.default_rng(3))
+
+        assert np.count_nonzero(puzzle) == MIN_GENERATED_CLUES
+        assert SudokuSolver(puzzle).has_unique_solution()
+
+    def test_generate_invalid_arguments_throw_exception(self):
+        with pytest.raises(ValueError):
+            generate(clues=16)
+
+        # Valid puzzles can have as few as 17 values, but random digging cannot reach them
+        with pytest.raises(ValueError):
+            generate(clues=MIN_GENERATED_CLUES - 1)
+
+        with pytest.raises(ValueError):
+            generate(difficulty='expert')
+
+    def test_generate_many(self):
+        puzzles = list(generate_many(3, clues=32, workers=2, seed=1))
+
+        assert len(puzzles) == 3
+        assert all(np.count_nonzero(puzzle) == 32 for puzzle in puzzles)
+        assert all(np.array_equal(a, b) for a, b in zip(puzzles, generate_many(3, clues=32, workers=1, seed=1)))
@@ -0,0 +1,301 @@
+import dbm
+import numpy as np
+from collections import OrderedDict
+from itertools import permutations
+
+# Every column order which keeps the 3 column stacks intact: the stacks can be reordered, and so can the columns
+# within each stack. Rows follow the same rule, and together with transposition and relabeling of the digits these
+# transformations map any Sudoku to an equivalent one.
+STACK_ORDERS = list(permutations(range(3)))
+COL_ORDERS = np.array([[3 * stacks[k] + cols[k][n] for k in range(3) for n in range(3)]
+                       for stacks in STACK_ORDERS
+                       for cols in ((a, b, c) for a in STACK_ORDERS for b in STACK_ORDERS for c in STACK_ORDERS)],
+                      dtype=np.int8)
+
+# Clue pattern of a row (9 bits, first column most significant) under each column order, for each clue pattern.
+# Built on first use by get_row_patterns.
+ROW_PATTERNS = None
+
+def get_row_patterns():
+    """
+    Returns the (512, column orders) table of row clue patterns, building it on first use.
+    """
+    global ROW_PATTERNS
+
+    if ROW_PATTERNS is None:
+        # Clue pattern of a stack (3 bits) under each column order within it, for each clue pattern of the stack
+        stack_patterns = np.array([[sum(((mask >> (2 - col)) & 1) << (2 - n) for n, col in enumerate(order))
+                                    for order in STACK_ORDERS] for mask in range(8)], dtype=np.int64)
+
+        # For each column order, the stack moved to each stack position and the index of its column order within it
+        order_stacks = COL_ORDERS[:, ::3] // 3
+        order_perms = np.array([[STACK_ORDERS.index(tuple(int(col) % 3 for col in stack))
+                                 for stack in order.reshape(3, 3)] for order in COL_ORDERS])
+
+        masks = np.arange(512)[:, None] >> np.array([6, 3, 0]) & 7
+        ROW_PATTERNS = sum(stack_patterns[masks[:, order_stacks[:, k]], order_perms[:, k]] << (6 - 3 * k)
+                           for k in range(3)).astype(np.int16)
+
+    return ROW_PATTERNS
+
+def relabel(values, labels, next_label):
+    """
+    Replaces digits by labels given in order of first appearance. Any digit without a label yet is given next_label,
+    which then increases. labels and next_label are updated in place, one entry per row of values.
+
+    Arguments:
+        - values: (K, L) array of digits, 0 for empty.
+        - labels: (K, 10) array mapping each digit to its label, 0 if it has none yet. labels[:, 0] must be 0.
+        - next_label: (K,) array of the next unused label.
+
+    Returns the (K, L) array of labels.
+    """
+    rows = np.arange(len(values))
+    result = np.empty_like(values)
+
+    for pos in range(values.shape[1]):
+        digits = values[:, pos]
+        new = (digits > 0) & (labels[rows, digits] == 0)
+        labels[rows[new], digits[new]] = next_label[new]
+        next_label[new] += 1
+        result[:, pos] = labels[rows, digits]
+
+    return result
+
+def first_appearance_labels(values):
+    """
+    Returns a (K, 10) array mapping each digit to its label, for K rows of digits (0 for empty) of shape (K, L). Digits
+    are labeled 1, 2, 3, ... in order of first appearance in their row, like relabel. Digits which do not appear and
+    0 get label 0.
+    """
+    found = values[:, :, None] == np.arange(1, 10)
+    present = found.any(axis=1)
+    first = np.where(present, found.argmax(axis=1), values.shape[1])
+
+    rank = np.empty_like(first)
+    rank[np.arange(len(values))[:, None], np.argsort(first, axis=1, kind='stable')] = np.arange(1, 10)
+
+    labels = np.zeros((len(values), 10), dtype=np.int64)
+    labels[:, 1:] = np.where(present, rank, 0)
+
+    return labels
+
+def canonical_form(matrix, max_candidates=20000):
+    """
+    Returns the canonical form of a puzzle, which is the same for every puzzle equivalent to it under transposing,
+    reordering bands, stacks and the rows or columns within them, and relabeling digits.
+
+    Of all the grids these transformations can reach, the canonical form is the one whose pattern of clues (ignoring
+    the digits) is lexicographically smallest, with ties broken by the smallest grid after relabeling digits in order
+    of first appearance. The pattern is built one row at a time from precomputed row patterns, keeping only the
+    partial transformations that give the smallest rows so far, so digits only need relabeling for the few
+    transformations left at the end. Puzzles with very few clues can leave too many tied transformations to follow,
+    in which case None is returned.
+
+    Returns a tuple (canonical grid as an 81 byte string, transform) or None. transform is a tuple
+    (transposed, row order, column order, labels) which can be passed to apply_transform and invert_transform.
+    """
+    grids = np.array([matrix, np.transpose(matrix)], dtype=np.int64)
+
+    # Clue pattern of each row of both grids under each column order: shape (2, 9, orders)
+    patterns = get_row_patterns()[(grids > 0) @ (1 << np.arange(8, -1, -1))]
+
+    # The first row can be any row of either grid under any column order
+    transposed, first_row, col_order = np.nonzero(patterns == patterns.min())
+    rows = first_row[:, None]
+
+    for level in range(1, 9):
+        # Each candidate continues with any unused row of its current band, or any row of an unused band
+        used = np.zeros((len(rows), 9), dtype=bool)
+        used[np.arange(len(rows))[:, None], rows] = True
+
+        if level % 3 == 0:
+            band_used = used.reshape(-1, 3, 3).any(axis=2)
+            allowed = ~np.repeat(band_used, 3, axis=1)
+
+        else:
+            allowed = (np.arange(9) // 3 == rows[:, level - 1, None] // 3) & ~used
+
+        parent, next_row = np.nonzero(allowed)
+
+        if len(parent) > max_candidates:
+            return None
+
+        keys = patterns[transposed[parent], next_row, col_order[parent]]
+
+        # Keep only the candidates giving the smallest row pattern
+        best = keys == keys.min()
+        parent = parent[best]
+
+        transposed, col_order = transposed[parent], col_order[parent]
+        rows = np.concatenate([rows[parent], next_row[best][:, None]], axis=1)
+
+    # Relabel the grid of every remaining transformation and keep the smallest
+    cols = COL_ORDERS[col_order]
+    values = grids[transposed[:, None, None], rows[:, :, None], cols[:, None, :]].reshape(-1, 81)
+    labels = first_appearance_labels(values)
+    relabeled = np.take_along_axis(labels, values, axis=1)
+    k = np.lexsort(relabeled[:, ::-1].T)[0]
+
+    transform = (bool(transposed[k]), rows[k], cols[k].astype(np.int64), labels[k])
+
+    return relabeled[k].astype(np.int8).tobytes(), transform
+
+def apply_transform(matrix, transform):
+    """
+    Returns the matrix rearranged and relabeled by a transform from canonical_form. Digits which had no label in the
+    transform are given the unused labels in order of first appearance.
+    """
+    transposed, row_order, col_order, labels = transform
+    grid = np.transpose(matrix) if transposed else np.asarray(matrix)
+    grid = grid[np.ix_(row_order, col_order)].astype(np.int64)
+
+    result = relabel(grid.reshape(1, 81), labels[None].copy(), np.array([labels.max() + 1]))
+
+    return result.reshape(9, 9)
+
+def invert_transform(matrix, transform):
+    """
+    Undoes a transform from canonical_form: maps a grid in canonical coordinates and labels back to the original ones.
+    Labels which had no digit in the transform are given the unused digits in increasing order.
+    """
+    transposed, row_order, col_order, labels = transform
+
+    digits = np.zeros(10, dtype=np.int64)
+    unused_digits = [num for num in range(1, 10) if labels[num] == 0]
+    unused_labels = [label for label in range(1, 10) if label not in labels]
+
+    for num in range(1, 10):
+        if labels[num] > 0:
+            digits[labels[num]] = num
+
+    digits[unused_labels] = unused_digits
+
+    grid = np.zeros((9, 9), dtype=np.int64)
+    grid[np.ix_(row_order, col_order)] = digits[np.asarray(matrix)]
+
+    return np.transpose(grid) if transposed else grid
+
+
+class SolutionCache:
+    """
+    Remembers solutions of puzzles, including puzzles which are only equivalent to one seen before under the Sudoku
+    symmetries. Pass one to SudokuSolver as its cache argument to put it in front of solve.
+
+    Lookups first try the exact puzzle, then its canonical form, whose stored solution is mapped back through the
+    puzzle's own transform. Both are kept in memory in least recently used order, and canonical entries can also be
+    kept on disk. Puzzles with no solution are remembered too.
+
+    Finding the canonical form takes under a millisecond, less than solving a hard puzzle but more than solving an
+    easy one. For workloads of easy puzzles, pass canonical=False to only remember exact repeats.
+    """
+
+    # Stored in place of a solution for puzzles which have none
+    NO_SOLUTION = b''
+
+    def __init__(self, max_size=10000, path=None, canonical=True):
+        """
+        Arguments:
+            - max_size: Maximum number of exact and of canonical entries kept in memory.
+            - path: Optional database file (opened with the dbm module) for canonical entries, shared across runs.
+            - canonical: Whether to look up and store puzzles by canonical form, so equivalent puzzles are found.
+        """
+        self.max_size = max_size
+        self.use_canonical = canonical
+        self.exact = OrderedDict()
+        self.canonical = OrderedDict()
+        self.store = None if path is None else dbm.open(path, 'c')
+        self.hits = 0
+        self.misses = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Closes the on-disk store, if any.
+        """
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    def remember(self, entries, key, value):
+        """
+        Adds key to an LRU dictionary of entries, evicting the least recently used entry if it is full.
+        """
+        entries[key] = value
+        entries.move_to_end(key)
+
+        if len(entries) > self.max_size:
+            entries.popitem(last=False)
+
+    def lookup(self, matrix):
+        """
+        Looks up the solution of a valid 9x9 puzzle.
+        Returns a tuple (found, solution, form). solution is a new 9x9 int32 array, or None if the puzzle has no
+        solution. form is the puzzle's canonical form if it was computed, otherwise None. Pass it on to add after
+        solving a puzzle which was not found, so it is not computed again.
+        """
+        key = np.asarray(matrix, dtype=np.int8).tobytes()
+        value = self.exact.get(key)
+        form = None
+
+        if value is None:
+            if self.use_canonical:
+                form = canonical_form(matrix)
+
+            if form is not None:
+                canonical_key, transform = form
+                value = self.canonical.get(canonical_key)
+
+                if value is None and self.store is not None and canonical_key in self.store:
+                    value = self.store[canonical_key]
+                    self.remember(self.canonical, canonical_key, value)
+
+                if value is not None and value != self.NO_SOLUTION:
+                    canonical_solution = np.frombuffer(value, dtype=np.int8).reshape(9, 9)
+                    value = invert_transform(canonical_solution, transform).astype(np.int8).tobytes()
+
+            if value is None:
+                self.misses += 1
+                return False, None, form
+
+            self.remember(self.exact, key, value)
+
+        else:
+            self.exact.move_to_end(key)
+
+        self.hits += 1
+
+        if value == self.NO_SOLUTION:
+            return True, None, form
+
+        return True, np.frombuffer(value, dtype=np.int8).reshape(9, 9).astype(np.int32), form
+
+    def add(self, matrix, solution, form=None):
+        """
+        Stores the solution of a valid 9x9 puzzle. Pass None as solution if the puzzle has no solution.
+
+        Arguments:
+            - form: Canonical form of the puzzle returned by lookup. Computed here if None.
+        """
+        key = np.asarray(matrix, dtype=np.int8).tobytes()
+        value = self.NO_SOLUTION if solution is None else np.asarray(solution, dtype=np.int8).tobytes()
+        self.remember(self.exact, key, value)
+
+        if form is None and self.use_canonical:
+            form = canonical_form(matrix)
+
+        if form is not None:
+            canonical_key, transform = form
+
+            if solution is not None:
+                value = apply_transform(solution, transform).astype(np.int8).tobytes()
+
+            self.remember(self.canonical, canonical_key, value)
+
+            if self.store is not None:
+                self.store[canonical_key] = value
@@ -0,0 +1,153 @@
+from solution_cache import SolutionCache, canonical_form, apply_transform, invert_transform
+from sudoku_solver import SudokuSolver
+from benchmark import load_corpus
+from time import perf_counter
+import solution_cache
+import numpy as np
+
+class TestSolutionCache:
+
+    def setup_method(self):
+        self.test_matrix = np.array([[0, 0, 0, 0, 0, 3, 0, 2, 7],
+                                    [1, 0, 0, 0, 0, 4, 6, 0, 3],
+                                    [0, 0, 0, 6, 0, 0, 0, 1, 0],
+                                    [6, 8, 5, 0, 7, 0, 1, 3, 2],
+                                    [7, 0, 0, 1, 6, 0, 5, 0, 8],
+                                    [0, 1, 9, 5, 0, 0, 0, 0, 4],
+                                    [9, 0, 0, 0, 4, 0, 0, 7, 1],
+                                    [0, 0, 0, 7, 2, 6, 0, 0, 0],
+                                    [0, 7, 3, 8, 9, 1, 0, 5, 0]])
+
+        self.correct_solution = np.array([[5, 6, 8, 9, 1, 3, 4, 2, 7],
+                                    [1, 9, 7, 2, 5, 4, 6, 8, 3],
+                                    [3, 4, 2, 6, 8, 7, 9, 1, 5],
+                                    [6, 8, 5, 4, 7, 9, 1, 3, 2],
+                                    [7, 3, 4, 1, 6, 2, 5, 9, 8],
+                                    [2, 1, 9, 5, 3, 8, 7, 6, 4],
+                                    [9, 2, 6, 3, 4, 5, 8, 7, 1],
+                                    [8, 5, 1, 7, 2, 6, 3, 4, 9],
+                                    [4, 7, 3, 8, 9, 1, 2, 5, 6]])
+
+        # Transposed, with bands, rows in a band, stacks and columns in a stack reordered, and digits 1 and 9 swapped
+        rows = [6, 8, 7, 0, 1, 2, 4, 3, 5]
+        cols = [3, 4, 5, 2, 0, 1, 6, 8, 7]
+        swap = np.array([0, 9, 2, 3, 4, 5, 6, 7, 8, 1])
+        self.equivalent_matrix = swap[self.test_matrix.T[np.ix_(rows, cols)]]
+        self.equivalent_solution = swap[self.correct_solution.T[np.ix_(rows, cols)]]
+
+    def test_equivalent_puzzles_have_same_canonical_form(self):
+        assert canonical_form(self.test_matrix)[0] == canonical_form(self.equivalent_matrix)[0]
+
+    def test_different_puzzles_have_different_canonical_form(self):
+        other = np.copy(self.test_matrix)
+        other[0, 0] = 5
+
+        assert canonical_form(self.test_matrix)[0] != canonical_form(other)[0]
+
+    def test_canonical_form_matches_transform(self):
+        canonical, transform = canonical_form(self.test_matrix)
+
+        assert apply_transform(self.test_matrix, transform).astype(np.int8).tobytes() == canonical
+
+    def test_invert_transform(self):
+        _, transform = canonical_form(self.equivalent_matrix)
+        canonical_solution = apply_transform(self.equivalent_solution, transform)
+
+        assert np.array_equal(invert_transform(canonical_solution, transform), self.equivalent_solution)
+
+    def test_too_many_candidates(self):
+        assert canonical_form(np.zeros((9, 9), dtype=np.int32)) is None
+
+    def test_miss_then_hit(self):
+        cache = SolutionCache()
+
+        assert cache.lookup(self.test_matrix)[:2] == (False, None)
+
+        cache.add(self.test_matrix, self.correct_solution)
+        found, solution, _ = cache.lookup(self.test_matrix)
+
+        assert found and np.array_equal(solution, self.correct_solution)
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_equivalent_puzzle_hit(self):
+        cache = SolutionCache()
+        cache.add(self.test_matrix, self.correct_solution)
+        found, solution, _ = cache.lookup(self.equivalent_matrix)
+
+        assert found and np.array_equal(solution, self.equivalent_solution)
+
+    def test_no_solution_is_cached(self):
+        cache = SolutionCache()
+        cache.add(self.test_matrix, None)
+
+        assert cache.lookup(self.test_matrix)[:2] == (True, None)
+
+    def test_lru_eviction(self):
+        other = np.copy(self.test_matrix)
+        other[0, 5] = 0
+        cache = SolutionCache(max_size=1)
+        cache.add(self.test_matrix, self.correct_solution)
+        cache.add(other, self.correct_solution)
+
+        assert len(cache.exact) == 1 and len(cache.canonical) == 1
+        assert not cache.lookup(self.test_matrix)[0]
+
+    def test_disk_store(self, tmp_path):
+        path = str(tmp_path / 'solutions')
+
+        with SolutionCache(path=path) as cache:
+            cache.add(self.test_matrix, self.correct_solution)
+
+        with SolutionCache(path=path) as cache:
+            found, solution, _ = cache.lookup(self.equivalent_matrix)
+
+        assert found and np.array_equal(solution, self.equivalent_solution)
+
+    def test_solver_uses_cache(self):
+        cache = SolutionCache()
+        SudokuSolver(self.test_matrix, cache=cache).solve()
+        solver = SudokuSolver(self.equivalent_matrix, cache=cache)
+
+        assert np.array_equal(solver.solve(), self.equivalent_solution)
+        assert solver.is_final_solution()
+        assert cache.hits == 1
+
+    def test_add_reuses_canonical_form(self, monkeypatch):
+        cache = SolutionCache()
+        calls = []
+        monkeypatch.setattr(solution_cache, 'canonical_form', lambda matrix: calls.append(1) or canonical_form(matrix))
+        SudokuSolver(self.test_matrix, cache=cache).solve()
+
+        assert len(calls) == 1
+        assert len(cache.canonical) == 1
+
+    def test_exact_only(self):
+        cache = SolutionCache(canonical=False)
+        cache.add(self.test_matrix, self.correct_solution)
+
+        assert cache.lookup(self.test_matrix)[0]
+        assert not cache.lookup(self.equivalent_matrix)[0]
+        assert len(cache.canonical) == 0
+
+    def test_equivalent_hit_faster_than_solving(self):
+        puzzle = load_corpus('hard')[0]
+        cache = SolutionCache()
+        SudokuSolver(puzzle, cache=cache).solve()
+        equivalent = puzzle.T[:, [2, 0, 1, 3, 4, 5, 8, 7, 6]]
+
+        def best_time(run):
+            times = []
+
+            for _ in range(5):
+                start = perf_counter()
+                run()
+                times.append(perf_counter() - start)
+
+            return min(times)
+
+        def cached():
+            # Forget the exact entry so the equivalent puzzle is found by its canonical form
+            cache.exact.clear()
+            assert cache.lookup(equivalent)[0]
+
+        assert best_time(cached) < best_time(lambda: SudokuSolver(equivalent).solve())
@@ -0,0 +1,118 @@
+import sys
+import argparse
+import numpy as np
+from itertools import islice
+from sudoku_solver import solve_many, HEURISTICS, BACKENDS
+
+NO_SOLUTION = 'unsolvable'
+
+DIGITS = set('0123456789')
+
+# Parsed in place of a malformed line, so it is rejected by validation like any other invalid puzzle
+MALFORMED = np.full((9, 9), -1, dtype=np.int32)
+
+def parse_line(line):
+    """
+    Returns the 9x9 int32 matrix for an 81 character puzzle line, or None if the line is malformed.
+    """
+    line = line.strip().replace('.', '0')
+
+    if len(line) != 81 or not set(line) <= DIGITS:
+        return None
+
+    return np.frombuffer(line.encode('ascii'), dtype=np.uint8).reshape(9, 9).astype(np.int32) - ord('0')
+
+def format_line(matrix):
+    """
+    Returns the 81 character line for a 9x9 matrix.
+    """
+    return ''.join(str(num) for num in matrix.flat)
+
+def read_puzzles(lines, errors=None):
+    """
+    Yields a 9x9 matrix for each puzzle line, skipping blank and comment lines. Malformed lines are yielded as
+    MALFORMED, and reported on errors (a text stream) if it is given.
+    """
+    for line_num, line in enumerate(lines, 1):
+        if not line.strip() or line.startswith('#'):
+            continue
+
+        matrix = parse_line(line)
+
+        if matrix is None:
+            if errors is not None:
+                errors.write("line {}: expected 81 digits or '.'\n".format(line_num))
+
+            matrix = MALFORMED
+
+        yield matrix
+
+def solve_stream(puzzles, chunk_size=256, workers=1, **solver_options):
+    """
+    Solves an iterable of 9x9 matrices lazily, yielding a tuple (solution, solved) for each one in order.
+    With more than one worker the chunks are spread over a SolverPool.
+    """
+    if workers > 1:
+        from solver_pool import SolverPool
+
+        with SolverPool(workers, chunk_size, **solver_options) as pool:
+            yield from pool.imap(puzzles)
+
+        return
+
+    puzzles = iter(puzzles)
+
+    while True:
+        chunk = list(islice(puzzles, chunk_size))
+
+        if not chunk:
+            return
+
+        solutions, solved = solve_many(np.array(chunk), **solver_options)
+
+        yield from zip(solutions, solved)
+
+def main(argv=None):
+    """
+    Streams puzzles from a file or standard input through the solver, writing one line per puzzle: the 81 digit
+    solution, or NO_SOLUTION if the puzzle is malformed, invalid or has no solution. Returns the exit status.
+    """
+    parser = argparse.ArgumentParser(description="Solve Sudoku puzzles given one per line as 81 characters, with 0 or . "
+                                                 "for empty squares. Blank lines and lines starting with # are skipped.")
+    parser.add_argument('input', nargs='?', default='-', help="puzzle file, or - for standard input (default)")
+    parser.add_argument('-o', '--output', default='-', help="solution file, or - for standard output (default)")
+    parser.add_argument('--workers', type=int, default=1, help="number of worker processes (default 1)")
+    parser.add_argument('--chunk-size', type=int, default=256, help="puzzles solved per batch (default 256)")
+    parser.add_argument('--heuristic', choices=HEURISTICS, default='mrv')
+    parser.add_argument('--backend', choices=BACKENDS, default='backtracking')
+    args = parser.parse_args(argv)
+
+    infile = sys.stdin if args.input == '-' else open(args.input)
+    outfile = sys.stdout if args.output == '-' else open(args.output, 'w')
+    total = solved_count = 0
+
+    try:
+        puzzles = read_puzzles(infile, sys.stderr)
+        results = solve_stream(puzzles, args.chunk_size, args.workers, heuristic=args.heuristic, backend=args.backend)
+
+        for solution, solved in results:
+            outfile.write((format_line(solution) if solved else NO_SOLUTION) + '\n')
+            total += 1
+
+            if solved:
+                solved_count += 1
+
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+
+        if outfile is not sys.stdout:
+            outfile.close()
+
+    sys.stderr.write("solved {} of {} puzzles\n".format(solved_count, total))
+
+    return 0 if solved_count == total else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
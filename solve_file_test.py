@@ -0,0 +1,51 @@
+from solve_file import parse_line, format_line, read_puzzles, solve_stream, main, NO_SOLUTION, MALFORMED
+import io
+import numpy as np
+
+class TestSolveFile:
+
+    def setup_method(self):
+        self.puzzle_line = '000003027100004603000600010685070132700160508019500004900040071000726000073891050'
+        self.solution_line = '568913427197254683342687915685479132734162598219538764926345871851726349473891256'
+
+    def test_parse_line(self):
+        matrix = parse_line(self.puzzle_line + '\n')
+
+        assert matrix.shape == (9, 9) and matrix.dtype == np.int32
+        assert matrix[0, 5] == 3 and matrix[8, 8] == 0
+
+    def test_parse_line_dots(self):
+        assert np.array_equal(parse_line(self.puzzle_line.replace('0', '.')), parse_line(self.puzzle_line))
+
+    def test_parse_line_malformed(self):
+        assert parse_line(self.puzzle_line[:80]) is None
+        assert parse_line(self.puzzle_line[:80] + 'x') is None
+
+    def test_format_line(self):
+        assert format_line(parse_line(self.puzzle_line)) == self.puzzle_line
+
+    def test_read_puzzles_skips_blank_and_comment_lines(self):
+        errors = io.StringIO()
+        lines = ['# header\n', '\n', self.puzzle_line + '\n', 'bad line\n']
+        puzzles = list(read_puzzles(lines, errors))
+
+        assert len(puzzles) == 2
+        assert puzzles[1] is MALFORMED
+        assert errors.getvalue().startswith('line 4:')
+
+    def test_solve_stream_in_order(self):
+        puzzles = [parse_line(self.puzzle_line), MALFORMED, parse_line(self.puzzle_line)]
+        results = list(solve_stream(iter(puzzles), chunk_size=2))
+
+        assert [bool(solved) for _, solved in results] == [True, False, True]
+        assert format_line(results[2][0]) == self.solution_line
+
+    def test_main(self, tmp_path):
+        infile = tmp_path / 'puzzles.txt'
+        outfile = tmp_path / 'solutions.txt'
+        infile.write_text(self.puzzle_line + '\n' + '1' * 81 + '\n')
+
+        status = main([str(infile), '-o', str(outfile), '--backend', 'dlx'])
+
+        assert status == 1
+        assert outfile.read_text() == self.solution_line + '\n' + NO_SOLUTION + '\n'
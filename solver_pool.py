@@ -0,0 +1,143 @@
+import os
+import numpy as np
+from collections import deque
+from multiprocessing import Pool
+from time import perf_counter
+from sudoku_solver import solve_many
+
+def solve_chunk(chunk, solver_options):
+    """
+    Solves a chunk of puzzles in a worker process. Returns a tuple (worker pid, solutions, solved, seconds spent).
+    """
+    start = perf_counter()
+    solutions, solved = solve_many(chunk, **solver_options)
+
+    return os.getpid(), solutions, solved, perf_counter() - start
+
+
+class SolverPool:
+    """
+    Spreads puzzles over a pool of worker processes, each running solve_many on chunks of the input. Results are
+    returned in input order, and only a bounded number of chunks is in flight at once so the input can be an
+    arbitrarily long stream.
+    """
+
+    def __init__(self, workers=None, chunk_size=256, **solver_options):
+        """
+        Arguments:
+            - workers: Number of worker processes. Defaults to the number of CPU cores.
+            - chunk_size: Number of puzzles sent to a worker at a time.
+            - solver_options: Keyword arguments passed to SudokuSolver, such as heuristic or backend.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.solver_options = solver_options
+        self.pool = Pool(self.workers)
+
+        # Worker pid -> [puzzles solved, seconds spent solving]
+        self.worker_stats = {}
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """
+        Shuts down the worker processes.
+        """
+        self.pool.close()
+        self.pool.join()
+
+    def chunks(self, puzzles):
+        """
+        Yields (chunk_size, 9, 9) arrays of the puzzles in order. The last chunk may be smaller.
+        """
+        chunk = []
+
+        for puzzle in puzzles:
+            chunk.append(puzzle)
+
+            if len(chunk) == self.chunk_size:
+                yield np.array(chunk, dtype=np.int32)
+                chunk = []
+
+        if chunk:
+            yield np.array(chunk, dtype=np.int32)
+
+    def imap(self, puzzles):
+        """
+        Solves a stream of puzzles, yielding a tuple (solution, solved) for each one in input order. See solve_many for
+        the meaning of the values. At most two chunks per worker are queued at any time.
+
+        Arguments:
+            - puzzles: Iterable of 9x9 numpy arrays or nested lists, with 0 for empty squares.
+        """
+        start = perf_counter()
+        pending = deque()
+
+        for chunk in self.chunks(puzzles):
+            pending.append(self.pool.apply_async(solve_chunk, (chunk, self.solver_options)))
+
+            if len(pending) >= 2 * self.workers:
+                yield from self.collect(pending.popleft())
+
+        while pending:
+            yield from self.collect(pending.popleft())
+
+        self.elapsed += perf_counter() - start
+
+    def collect(self, result):
+        """
+        Waits for a chunk to finish, records its worker's throughput and yields its (solution, solved) tuples.
+        """
+        pid, solutions, solved, seconds = result.get()
+
+        stats = self.worker_stats.setdefault(pid, [0, 0.0])
+        stats[0] += len(solutions)
+        stats[1] += seconds
+
+        yield from zip(solutions, solved)
+
+    def solve(self, puzzles):
+        """
+        Solves an (N, 9, 9) array of puzzles, returning a tuple (solutions, solved) like solve_many.
+        """
+        results = list(self.imap(puzzles))
+
+        if not results:
+            return np.zeros((0, 9, 9), dtype=np.int32), np.zeros(0, dtype=bool)
+
+        solutions, solved = zip(*results)
+
+        return np.array(solutions), np.array(solved)
+
+    def report(self):
+        """
+        Returns a summary of the puzzles solved and the throughput of each worker and of the whole pool.
+        """
+        lines = []
+        total = 0
+
+        for n, (pid, (count, seconds)) in enumerate(sorted(self.worker_stats.items())):
+            rate = count / seconds if seconds > 0 else 0.0
+            lines.append("worker {} (pid {}): {} puzzles, {:.1f} puzzles/sec".format(n, pid, count, rate))
+            total += count
+
+        rate = total / self.elapsed if self.elapsed > 0 else 0.0
+        lines.append("total: {} puzzles in {:.2f} sec, {:.1f} puzzles/sec".format(total, self.elapsed, rate))
+
+        return "\n".join(lines)
+
+
+def solve_parallel(puzzles, workers=None, chunk_size=256, **solver_options):
+    """
+    Solves an (N, 9, 9) array of puzzles over a SolverPool and returns a tuple (solutions, solved) like solve_many.
+    """
+    with SolverPool(workers, chunk_size, **solver_options) as pool:
+        return pool.solve(puzzles)
@@ -0,0 +1,60 @@
+from solver_pool import SolverPool, solve_parallel
+import numpy as np
+import pytest
+
+class TestSolverPool:
+
+    def setup_method(self):
+        self.test_matrix = np.array([[0, 0, 0, 0, 0, 3, 0, 2, 7],
+                                    [1, 0, 0, 0, 0, 4, 6, 0, 3],
+                                    [0, 0, 0, 6, 0, 0, 0, 1, 0],
+                                    [6, 8, 5, 0, 7, 0, 1, 3, 2],
+                                    [7, 0, 0, 1, 6, 0, 5, 0, 8],
+                                    [0, 1, 9, 5, 0, 0, 0, 0, 4],
+                                    [9, 0, 0, 0, 4, 0, 0, 7, 1],
+                                    [0, 0, 0, 7, 2, 6, 0, 0, 0],
+                                    [0, 7, 3, 8, 9, 1, 0, 5, 0]])
+
+        self.correct_solution = np.array([[5, 6, 8, 9, 1, 3, 4, 2, 7],
+                                    [1, 9, 7, 2, 5, 4, 6, 8, 3],
+                                    [3, 4, 2, 6, 8, 7, 9, 1, 5],
+                                    [6, 8, 5, 4, 7, 9, 1, 3, 2],
+                                    [7, 3, 4, 1, 6, 2, 5, 9, 8],
+                                    [2, 1, 9, 5, 3, 8, 7, 6, 4],
+                                    [9, 2, 6, 3, 4, 5, 8, 7, 1],
+                                    [8, 5, 1, 7, 2, 6, 3, 4, 9],
+                                    [4, 7, 3, 8, 9, 1, 2, 5, 6]])
+
+    def test_results_in_input_order(self):
+        # Every third puzzle is invalid
+        puzzles = [self.test_matrix if n % 3 else np.ones((9, 9)) for n in range(10)]
+
+        with SolverPool(workers=2, chunk_size=3) as pool:
+            results = list(pool.imap(iter(puzzles)))
+
+        assert [bool(solved) for _, solved in results] == [n % 3 != 0 for n in range(10)]
+        assert np.array_equal(results[1][0], self.correct_solution)
+        assert np.array_equal(results[3][0], np.ones((9, 9)))
+
+    def test_report_counts_every_puzzle(self):
+        with SolverPool(workers=2, chunk_size=2) as pool:
+            pool.solve(np.stack([self.test_matrix] * 5))
+            report = pool.report()
+
+        assert sum(count for count, _ in pool.worker_stats.values()) == 5
+        assert report.splitlines()[-1].startswith("total: 5 puzzles")
+
+    def test_solve_parallel(self):
+        solutions, solved = solve_parallel(np.stack([self.test_matrix] * 4), workers=2, chunk_size=1, backend='dlx')
+
+        assert solved.all()
+        assert all(np.array_equal(solution, self.correct_solution) for solution in solutions)
+
+    def test_solve_parallel_empty_input(self):
+        solutions, solved = solve_parallel(np.zeros((0, 9, 9)), workers=1)
+
+        assert solutions.shape == (0, 9, 9) and solved.shape == (0,)
+
+    def test_invalid_chunk_size_throws_exception(self):
+        with pytest.raises(ValueError):
+            SolverPool(workers=1, chunk_size=0)
@@ -0,0 +1,366 @@
+import os
+import sys
+import json
+import asyncio
+import argparse
+import multiprocessing
+import numpy as np
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor
+from solver_pool import solve_chunk
+from solve_file import parse_line, format_line
+from sudoku_solver import HEURISTICS, BACKENDS
+
+# Largest request body accepted, in bytes
+MAX_BODY = 64 * 1024
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+           500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+class QueueFull(Exception):
+    """
+    Raised by SolverService.solve when the queue of waiting puzzles is full.
+    """
+
+
+class SolverService:
+    """
+    HTTP/JSON front end for the solver, built on asyncio from the standard library.
+
+    POST /solve takes a JSON object {"puzzle": ...} holding an 81 character puzzle string (0 or . for empty squares)
+    or a 9x9 list of lists. Requests arriving close together are gathered into micro-batches, and each batch is solved
+    by solve_many in a pool of worker processes. The reply holds the solution as an 81 character string (null if the
+    puzzle is invalid or has no solution) and the time spent queued, solving and in total.
+
+    At most max_queue puzzles wait for a worker. Once the queue is full new requests are turned away straight away
+    with status 503, so a slow or overloaded service pushes back on its clients instead of piling up work. If a worker
+    fails while solving a batch, every request in it gets status 500. GET /stats returns request and batch counters.
+    """
+
+    def __init__(self, workers=None, batch_size=64, batch_delay=0.002, max_queue=1024, **solver_options):
+        """
+        Arguments:
+            - workers: Number of worker processes. Defaults to the number of CPU cores.
+            - batch_size: Largest number of puzzles sent to a worker at once.
+            - batch_delay: Seconds to wait for more puzzles after the first one of a batch arrives.
+            - max_queue: Largest number of puzzles waiting for a worker before requests are rejected.
+            - solver_options: Keyword arguments passed to SudokuSolver, such as heuristic or backend.
+        """
+        if batch_size < 1 or max_queue < 1:
+            raise ValueError("batch_size and max_queue must be at least 1")
+
+        self.workers = workers or os.cpu_count() or 1
+
+        # Workers start when the first batch arrives. Forked workers would inherit the sockets open at that time and
+        # keep those connections from closing, so they are started from a clean process instead.
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(method))
+        self.batch_size = batch_size
+        self.batch_delay = batch_delay
+        self.max_queue = max_queue
+        self.solver_options = solver_options
+
+        # Created in start, since they belong to the running event loop
+        self.queue = None
+        self.slots = None
+        self.batcher = None
+
+        self.requests = 0
+        self.rejected = 0
+        self.failed = 0
+        self.batches = 0
+        self.batched_puzzles = 0
+
+    async def start(self, host='127.0.0.1', port=8080):
+        """
+        Starts the batching task and listens for connections. Returns the asyncio server.
+        """
+        self.queue = asyncio.Queue(self.max_queue)
+
+        # One batch in flight per worker process; further batches wait in the queue
+        self.slots = asyncio.Semaphore(self.workers)
+        self.batcher = asyncio.get_running_loop().create_task(self.run_batches())
+
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    def close(self):
+        """
+        Stops the batching task and shuts down the worker processes.
+        """
+        if self.batcher is not None:
+            self.batcher.cancel()
+
+        self.executor.shutdown(wait=False)
+
+    async def solve(self, puzzle):
+        """
+        Queues a 9x9 puzzle and waits for its batch to be solved. Raises QueueFull if the queue is full.
+        Returns a dictionary with the solution (None if there is none), the size of the batch and the time in
+        milliseconds spent queued, solving the batch and in total.
+        """
+        self.requests += 1
+        start = perf_counter()
+        future = asyncio.get_running_loop().create_future()
+
+        try:
+            self.queue.put_nowait((puzzle, future, start))
+
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise QueueFull()
+
+        solution, solved, queued, seconds, batch_size = await future
+
+        return {
+            'solution': format_line(solution) if solved else None,
+            'batch_size': batch_size,
+            'queue_ms': queued * 1000,
+            'solve_ms': seconds * 1000,
+            'total_ms': (perf_counter() - start) * 1000,
+        }
+
+    async def run_batches(self):
+        """
+        Takes puzzles off the queue and hands them to the workers in batches. A batch is sent when it has batch_size
+        puzzles or batch_delay has passed since its first puzzle arrived, as soon as a worker is free.
+        """
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_delay
+
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+
+                if timeout <= 0:
+                    break
+
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+
+                except asyncio.TimeoutError:
+                    break
+
+            await self.slots.acquire()
+
+            # Puzzles which arrived while waiting for a worker can still join the batch
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            loop.create_task(self.solve_batch(batch))
+
+    async def solve_batch(self, batch):
+        """
+        Solves a batch of (puzzle, future, arrival time) entries in a worker process and sets each future's result.
+        """
+        loop = asyncio.get_running_loop()
+        dispatched = perf_counter()
+        self.batches += 1
+        self.batched_puzzles += len(batch)
+
+        try:
+            puzzles = np.array([puzzle for puzzle, _, _ in batch], dtype=np.int32)
+            _, solutions, solved, seconds = await loop.run_in_executor(self.executor, solve_chunk, puzzles,
+                                                                      self.solver_options)
+
+            for (_, future, start), solution, ok in zip(batch, solutions, solved):
+                if not future.done():
+                    future.set_result((solution, ok, dispatched - start, seconds, len(batch)))
+
+        except Exception as error:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(error)
+
+        finally:
+            self.slots.release()
+
+    def get_stats(self):
+        """
+        Returns the request and batch counters as a dictionary.
+        """
+        return {
+            'requests': self.requests,
+            'rejected': self.rejected,
+            'failed': self.failed,
+            'queued': self.queue.qsize() if self.queue is not None else 0,
+            'batches': self.batches,
+            'mean_batch_size': self.batched_puzzles / self.batches if self.batches else 0.0,
+            'workers': self.workers,
+        }
+
+    async def route(self, method, path, body):
+        """
+        Handles one request. Returns a tuple (status code, JSON-serializable reply).
+        """
+        if path == '/stats':
+            if method != 'GET':
+                return 405, {'error': "use GET"}
+
+            return 200, self.get_stats()
+
+        if path != '/solve':
+            return 404, {'error': "unknown path {}".format(path)}
+
+        if method != 'POST':
+            return 405, {'error': "use POST"}
+
+        puzzle = parse_puzzle(body)
+
+        if puzzle is None:
+            return 400, {'error': "expected a JSON object with a puzzle as 81 characters or a 9x9 list of lists"}
+
+        try:
+            return 200, await self.solve(puzzle)
+
+        except QueueFull:
+            return 503, {'error': "queue is full, try again later"}
+
+        except Exception as error:
+            # A worker failed on this request's batch, for example because the process pool broke
+            self.failed += 1
+            return 500, {'error': "solver failed: {}: {}".format(type(error).__name__, error)}
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serves HTTP/1.1 requests on one connection until the client closes it or asks to.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+
+                if not request_line.strip():
+                    break
+
+                headers = {}
+
+                while True:
+                    line = await reader.readline()
+
+                    if not line.strip():
+                        break
+
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                parts = request_line.decode('latin-1').split()
+                keep_alive = len(parts) == 3 and parts[2] == 'HTTP/1.1' and headers.get('connection') != 'close'
+
+                try:
+                    length = int(headers.get('content-length', 0))
+
+                except ValueError:
+                    length = -1
+
+                if len(parts) != 3 or length < 0:
+                    status, reply, keep_alive = 400, {'error': "malformed request"}, False
+
+                elif length > MAX_BODY:
+                    status, reply, keep_alive = 413, {'error': "body larger than {} bytes".format(MAX_BODY)}, False
+
+                else:
+                    body = await reader.readexactly(length)
+                    status, reply = await self.route(parts[0], parts[1].split('?')[0], body)
+
+                writer.write(format_response(status, reply, keep_alive))
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+        finally:
+            writer.close()
+
+
+def parse_puzzle(body):
+    """
+    Returns the 9x9 int32 matrix in a /solve request body, or None if the body is not valid. A puzzle given as a list
+    of lists must hold plain integers from 0 to 9; floats and booleans are rejected rather than converted.
+    """
+    try:
+        puzzle = json.loads(body)['puzzle']
+
+    except (ValueError, KeyError, TypeError):
+        return None
+
+    if isinstance(puzzle, str):
+        return parse_line(puzzle)
+
+    if not isinstance(puzzle, list) or len(puzzle) != 9:
+        return None
+
+    for row in puzzle:
+        # type() rather than isinstance, since bool is a subclass of int
+        if not isinstance(row, list) or len(row) != 9 or not all(type(num) is int and 0 <= num <= 9 for num in row):
+            return None
+
+    try:
+        return np.array(puzzle, dtype=np.int32)
+
+    except (ValueError, TypeError, OverflowError):
+        return None
+
+def format_response(status, reply, keep_alive):
+    """
+    Returns the bytes of an HTTP response with a JSON body.
+    """
+    body = json.dumps(reply).encode('utf-8')
+    headers = ["HTTP/1.1 {} {}".format(status, REASONS[status]),
+               "Content-Type: application/json",
+               "Content-Length: {}".format(len(body)),
+               "Connection: {}".format('keep-alive' if keep_alive else 'close')]
+
+    if status == 503:
+        headers.append("Retry-After: 1")
+
+    return ('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1') + body
+
+async def serve(host, port, **service_options):
+    """
+    Runs a SolverService until the process is stopped.
+    """
+    service = SolverService(**service_options)
+
+    try:
+        server = await service.start(host, port)
+        sys.stderr.write("solving on http://{}:{}/solve with {} workers\n".format(host, port, service.workers))
+
+        async with server:
+            await server.serve_forever()
+
+    finally:
+        service.close()
+
+def main(argv=None):
+    """
+    Parses the command line and runs the service.
+    """
+    parser = argparse.ArgumentParser(description="Serve the Sudoku solver over HTTP: POST {\"puzzle\": \"<81 digits>\"} "
+                                                 "to /solve.")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8080, help="port to listen on (default 8080)")
+    parser.add_argument('--workers', type=int, help="number of worker processes (default one per CPU core)")
+    parser.add_argument('--batch-size', type=int, default=64, help="largest number of puzzles per batch (default 64)")
+    parser.add_argument('--batch-delay', type=float, default=0.002,
+                        help="seconds to wait for a batch to fill up (default 0.002)")
+    parser.add_argument('--max-queue', type=int, default=1024,
+                        help="puzzles allowed to wait before requests are rejected (default 1024)")
+    parser.add_argument('--heuristic', choices=HEURISTICS, default='mrv')
+    parser.add_argument('--backend', choices=BACKENDS, default='backtracking')
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.host, args.port, workers=args.workers, batch_size=args.batch_size,
+                          batch_delay=args.batch_delay, max_queue=args.max_queue, heuristic=args.heuristic,
+                          backend=args.backend))
+
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
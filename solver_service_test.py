@@ -0,0 +1,189 @@
+from solver_service import SolverService, QueueFull, parse_puzzle, format_response
+from solve_file import format_line
+import numpy as np
+import asyncio
+import json
+import pytest
+
+class TestSolverService:
+
+    def setup_method(self):
+        self.test_matrix = np.array([[0, 0, 0, 0, 0, 3, 0, 2, 7],
+                                    [1, 0, 0, 0, 0, 4, 6, 0, 3],
+                                    [0, 0, 0, 6, 0, 0, 0, 1, 0],
+                                    [6, 8, 5, 0, 7, 0, 1, 3, 2],
+                                    [7, 0, 0, 1, 6, 0, 5, 0, 8],
+                                    [0, 1, 9, 5, 0, 0, 0, 0, 4],
+                                    [9, 0, 0, 0, 4, 0, 0, 7, 1],
+                                    [0, 0, 0, 7, 2, 6, 0, 0, 0],
+                                    [0, 7, 3, 8, 9, 1, 0, 5, 0]])
+
+        self.correct_solution = np.array([[5, 6, 8, 9, 1, 3, 4, 2, 7],
+                                    [1, 9, 7, 2, 5, 4, 6, 8, 3],
+                                    [3, 4, 2, 6, 8, 7, 9, 1, 5],
+                                    [6, 8, 5, 4, 7, 9, 1, 3, 2],
+                                    [7, 3, 4, 1, 6, 2, 5, 9, 8],
+                                    [2, 1, 9, 5, 3, 8, 7, 6, 4],
+                                    [9, 2, 6, 3, 4, 5, 8, 7, 1],
+                                    [8, 5, 1, 7, 2, 6, 3, 4, 9],
+                                    [4, 7, 3, 8, 9, 1, 2, 5, 6]])
+
+    def run_service(self, client, **service_options):
+        """
+        Starts a service on a free port, runs client(port) against it and returns client's result.
+        """
+        async def main():
+            service = SolverService(workers=1, **service_options)
+
+            try:
+                server = await service.start('127.0.0.1', 0)
+                port = server.sockets[0].getsockname()[1]
+
+                async with server:
+                    return await client(port)
+
+            finally:
+                service.close()
+
+        return asyncio.run(main())
+
+    async def request(self, port, method, path, body=None):
+        """
+        Sends one HTTP request and returns (status, headers, decoded JSON reply).
+        """
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        data = b'' if body is None else json.dumps(body).encode('utf-8')
+        head = "{} {} HTTP/1.1\r\nHost: test\r\nConnection: close\r\nContent-Length: {}\r\n\r\n".format(
+            method, path, len(data))
+        writer.write(head.encode('latin-1') + data)
+        response = await reader.read()
+        writer.close()
+
+        head, _, body = response.partition(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        headers = dict(line.split(': ', 1) for line in lines[1:])
+
+        return int(lines[0].split()[1]), headers, json.loads(body)
+
+    def test_solve_string_and_list(self):
+        async def client(port):
+            return await asyncio.gather(
+                self.request(port, 'POST', '/solve', {'puzzle': format_line(self.test_matrix)}),
+                self.request(port, 'POST', '/solve', {'puzzle': self.test_matrix.tolist()}))
+
+        for status, _, reply in self.run_service(client):
+            assert status == 200
+            assert reply['solution'] == format_line(self.correct_solution)
+            assert reply['total_ms'] >= reply['queue_ms'] >= 0
+            assert reply['solve_ms'] >= 0
+
+    def test_concurrent_requests_are_batched(self):
+        async def client(port):
+            replies = await asyncio.gather(*[
+                self.request(port, 'POST', '/solve', {'puzzle': format_line(self.test_matrix)}) for _ in range(8)])
+            stats = await self.request(port, 'GET', '/stats')
+
+            return replies, stats[2]
+
+        replies, stats = self.run_service(client, batch_delay=0.05)
+
+        assert all(reply['solution'] == format_line(self.correct_solution) for _, _, reply in replies)
+        assert stats['requests'] == 8
+        assert stats['batches'] < 8
+        assert max(reply['batch_size'] for _, _, reply in replies) > 1
+
+    def test_unsolvable_puzzle(self):
+        async def client(port):
+            return await self.request(port, 'POST', '/solve', {'puzzle': '11' + '0' * 79})
+
+        status, _, reply = self.run_service(client)
+
+        assert status == 200
+        assert reply['solution'] is None
+
+    def test_bad_requests(self):
+        async def client(port):
+            return await asyncio.gather(
+                self.request(port, 'POST', '/solve', {'puzzle': '123'}),
+                self.request(port, 'POST', '/solve', {'grid': format_line(self.test_matrix)}),
+                self.request(port, 'GET', '/solve'),
+                self.request(port, 'GET', '/unknown'))
+
+        statuses = [status for status, _, _ in self.run_service(client)]
+
+        assert statuses == [400, 400, 405, 404]
+
+    def test_bad_puzzle_values(self):
+        async def client(port):
+            return await asyncio.gather(*[
+                self.request(port, 'POST', '/solve', {'puzzle': [[value] * 9] * 9})
+                for value in (1099511627776, 10, -1, 1.7, True, '1', None)])
+
+        replies = self.run_service(client)
+
+        assert [status for status, _, _ in replies] == [400] * 7
+        assert all('error' in reply for _, _, reply in replies)
+
+    def test_worker_failure(self):
+        async def client(port):
+            reply = await self.request(port, 'POST', '/solve', {'puzzle': format_line(self.test_matrix)})
+            stats = await self.request(port, 'GET', '/stats')
+
+            return reply, stats[2]
+
+        # The workers' solve_many rejects the heuristic, so every batch fails
+        (status, _, reply), stats = self.run_service(client, heuristic='unknown')
+
+        assert status == 500
+        assert 'ValueError' in reply['error']
+        assert stats['failed'] == 1
+
+    def test_full_queue_rejects(self):
+        async def main():
+            service = SolverService(workers=1, max_queue=2)
+
+            try:
+                # Fill the queue without starting the batching task
+                service.queue = asyncio.Queue(service.max_queue)
+                waiting = [asyncio.ensure_future(service.solve(self.test_matrix)) for _ in range(2)]
+                await asyncio.sleep(0)
+
+                with pytest.raises(QueueFull):
+                    await service.solve(self.test_matrix)
+
+                for task in waiting:
+                    task.cancel()
+
+                return service.get_stats()
+
+            finally:
+                service.close()
+
+        stats = asyncio.run(main())
+
+        assert stats['requests'] == 3
+        assert stats['rejected'] == 1
+
+    def test_503_response(self):
+        response = format_response(503, {'error': "queue is full"}, False)
+
+        assert response.startswith(b'HTTP/1.1 503 Service Unavailable\r\n')
+        assert b'Retry-After: 1\r\n' in response
+
+    def test_parse_puzzle(self):
+        assert np.array_equal(parse_puzzle(json.dumps({'puzzle': format_line(self.test_matrix)})), self.test_matrix)
+        assert parse_puzzle(json.dumps({'puzzle': [[1, 2], [3, 4]]})) is None
+        assert parse_puzzle(b'not json') is None
+        assert parse_puzzle(json.dumps([1, 2, 3])) is None
+        assert parse_puzzle(json.dumps({'puzzle': [[2 ** 40] * 9] * 9})) is None
+        assert parse_puzzle(json.dumps({'puzzle': [[1.7] * 9] * 9})) is None
+        assert parse_puzzle(json.dumps({'puzzle': [[True] * 9] * 9})) is None
+        assert parse_puzzle(json.dumps({'puzzle': [[0] * 9] * 8 + [[0] * 8]})) is None
+        assert np.array_equal(parse_puzzle(json.dumps({'puzzle': self.test_matrix.tolist()})), self.test_matrix)
+
+    def test_invalid_options(self):
+        with pytest.raises(ValueError):
+            SolverService(batch_size=0)
+
+        with pytest.raises(ValueError):
+            SolverService(max_queue=0)
@@ -0,0 +1,176 @@
+import numpy as np
+from sudoku_solver import SudokuSolver
+
+class SolverSession:
+    """
+    Follows a puzzle while a player fills it in, so every entry can be checked straight away. The puzzle is solved once
+    when the session starts. After that each entry only updates how often its digit appears in the cell's row, column
+    and box, and is compared with the known solution. An entry which repeats a digit in its row, column or box is
+    found from those counts without searching. A new search is only needed when the puzzle has several solutions and
+    an entry leaves the one found so far.
+    """
+
+    def __init__(self, matrix, **solver_options):
+        """
+        Arguments:
+            - matrix: Starting 9x9 puzzle (or any size SudokuSolver accepts), with 0 for empty squares.
+            - solver_options: Keyword arguments passed to SudokuSolver, such as heuristic or backend.
+        """
+        self.solver_options = solver_options
+        solver = SudokuSolver(matrix, **solver_options)
+
+        if solver.matrix is None:
+            raise ValueError("matrix is not a valid Sudoku matrix")
+
+        self.start_matrix = np.copy(solver.matrix)
+        self.geometry = solver.geometry
+        self.unique = solver.has_unique_solution()
+
+        # Solution of the starting puzzle, and a solution which agrees with every current entry (None if there is none)
+        self.start_solution = solver.solve()
+
+        # Number of empty starting squares
+        self.open_cells = int(np.count_nonzero(self.start_matrix == 0))
+        self.reset()
+
+    def reset(self):
+        """
+        Removes every entry, going back to the starting puzzle.
+        """
+        geometry = self.geometry
+        self.cells = bytearray(self.start_matrix.ravel().astype(np.uint8).tobytes())
+
+        # Times each digit appears in each unit (see Geometry.units), at unit * (size + 1) + digit, and the number of
+        # extra copies of digits over all units
+        self.unit_counts = [0] * (len(geometry.units) * (geometry.size + 1))
+        self.duplicates = 0
+
+        for cell, num in enumerate(self.cells):
+            if num > 0:
+                self.count(cell, num, 1)
+
+        self.solution = self.start_solution
+
+        # Number of entries which differ from start_solution, and number of entries
+        self.mismatches = 0
+        self.filled = 0
+
+    def count(self, cell, num, change):
+        """
+        Adds change (1 or -1) to the number of times num appears in the row, column and box of cell.
+        """
+        unit_counts = self.unit_counts
+        stride = self.geometry.size + 1
+
+        for unit in self.geometry.units_of[cell]:
+            index = unit * stride + num
+
+            if change > 0 and unit_counts[index] > 0:
+                self.duplicates += 1
+
+            elif change < 0 and unit_counts[index] > 1:
+                self.duplicates -= 1
+
+            unit_counts[index] += change
+
+    def get_value(self, row, col):
+        """
+        Returns the current number at (row, col), 0 if it is empty.
+        """
+        return self.cells[row * self.geometry.size + col]
+
+    def set_value(self, row, col, num):
+        """
+        Enters num at (row, col), or clears it if num is 0. Starting values cannot be changed.
+        Returns a solution which agrees with every current entry, or None if the entries make the puzzle unsolvable.
+        """
+        size = self.geometry.size
+
+        if self.start_matrix[row, col] != 0:
+            raise ValueError("cannot change a starting value")
+
+        if not 0 <= num <= size:
+            raise ValueError("num must be between 0 and {}".format(size))
+
+        num = int(num)
+        cell = row * size + col
+        old_num = self.cells[cell]
+
+        if old_num > 0:
+            self.count(cell, old_num, -1)
+
+        if num > 0:
+            self.count(cell, num, 1)
+
+        self.cells[cell] = num
+        self.filled += (num > 0) - (old_num > 0)
+
+        if self.start_solution is None:
+            # Entries cannot make an unsolvable puzzle solvable
+            return None
+
+        expected = self.start_solution[row, col]
+
+        if old_num > 0 and old_num != expected:
+            self.mismatches -= 1
+
+        if num > 0 and num != expected:
+            self.mismatches += 1
+
+        if self.mismatches == 0:
+            self.solution = self.start_solution
+
+        elif self.unique or self.duplicates > 0:
+            # Any entry differing from the only solution, or repeating a digit in its row, column or box, leaves none
+            self.solution = None
+
+        elif self.solution is None or (num > 0 and self.solution[row, col] != num):
+            # Clearing an entry keeps any solution found so far valid, so only a new or changed entry needs a search
+            self.solution = self.search()
+
+        return self.solution
+
+    def search(self):
+        """
+        Returns a solution of the puzzle with the current entries, or None if there is none.
+        """
+        matrix = np.frombuffer(self.cells, dtype=np.uint8).reshape(self.start_matrix.shape).astype(np.int32)
+
+        return SudokuSolver(matrix, copy=False, **self.solver_options).solve()
+
+    def is_solvable(self):
+        """
+        Returns True if the puzzle can still be completed without changing any entry.
+        """
+        return self.solution is not None
+
+    def has_conflict(self):
+        """
+        Returns True if any row, column or box contains a digit more than once. Takes constant time.
+        """
+        return self.duplicates > 0
+
+    def is_conflict(self, row, col):
+        """
+        Returns True if the number at (row, col) also appears elsewhere in its row, column or box.
+        """
+        cell = row * self.geometry.size + col
+        num = self.cells[cell]
+        stride = self.geometry.size + 1
+
+        return num > 0 and any(self.unit_counts[unit * stride + num] > 1 for unit in self.geometry.units_of[cell])
+
+    def is_solved(self):
+        """
+        Returns True if every square is filled and the entries form a solution. Takes constant time.
+        """
+        return self.filled == self.open_cells and self.solution is not None
+
+    def is_correct(self, row, col):
+        """
+        Returns True if the number at (row, col) agrees with the solution. The current solution is used if the
+        entries still allow one, otherwise the solution of the starting puzzle.
+        """
+        solution = self.start_solution if self.solution is None else self.solution
+
+        return solution is not None and self.get_value(row, col) == solution[row, col]
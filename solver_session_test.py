@@ -0,0 +1,143 @@
+from solver_session import SolverSession
+import numpy as np
+import pytest
+
+class TestSolverSession:
+
+    def setup_method(self):
+        self.test_matrix = np.array([[0, 0, 0, 0, 0, 3, 0, 2, 7],
+                                    [1, 0, 0, 0, 0, 4, 6, 0, 3],
+                                    [0, 0, 0, 6, 0, 0, 0, 1, 0],
+                                    [6, 8, 5, 0, 7, 0, 1, 3, 2],
+                                    [7, 0, 0, 1, 6, 0, 5, 0, 8],
+                                    [0, 1, 9, 5, 0, 0, 0, 0, 4],
+                                    [9, 0, 0, 0, 4, 0, 0, 7, 1],
+                                    [0, 0, 0, 7, 2, 6, 0, 0, 0],
+                                    [0, 7, 3, 8, 9, 1, 0, 5, 0]])
+
+        self.correct_solution = np.array([[5, 6, 8, 9, 1, 3, 4, 2, 7],
+                                    [1, 9, 7, 2, 5, 4, 6, 8, 3],
+                                    [3, 4, 2, 6, 8, 7, 9, 1, 5],
+                                    [6, 8, 5, 4, 7, 9, 1, 3, 2],
+                                    [7, 3, 4, 1, 6, 2, 5, 9, 8],
+                                    [2, 1, 9, 5, 3, 8, 7, 6, 4],
+                                    [9, 2, 6, 3, 4, 5, 8, 7, 1],
+                                    [8, 5, 1, 7, 2, 6, 3, 4, 9],
+                                    [4, 7, 3, 8, 9, 1, 2, 5, 6]])
+
+        self.session = SolverSession(self.test_matrix)
+
+    def test_starting_solution(self):
+        assert self.session.unique
+        assert np.array_equal(self.session.solution, self.correct_solution)
+
+    def test_correct_entry_keeps_solution(self):
+        solution = self.session.set_value(0, 0, 5)
+
+        assert np.array_equal(solution, self.correct_solution)
+        assert self.session.is_correct(0, 0) and self.session.is_solvable()
+
+    def test_wrong_entry_makes_puzzle_unsolvable(self):
+        assert self.session.set_value(0, 0, 6) is None
+        assert not self.session.is_solvable() and not self.session.is_correct(0, 0)
+
+    def test_clearing_wrong_entry_restores_solution(self):
+        self.session.set_value(0, 0, 6)
+        self.session.set_value(0, 1, 2)
+        self.session.set_value(0, 1, 6)
+
+        assert not self.session.is_solvable()
+        assert self.session.is_correct(0, 1)
+
+        self.session.set_value(0, 0, 0)
+
+        assert np.array_equal(self.session.solution, self.correct_solution)
+
+    def test_reset(self):
+        self.session.set_value(0, 0, 6)
+        self.session.reset()
+
+        assert self.session.get_value(0, 0) == 0 and self.session.is_solvable()
+
+    def test_starting_value_cannot_change(self):
+        with pytest.raises(ValueError):
+            self.session.set_value(0, 5, 4)
+
+    def test_invalid_num_throws_exception(self):
+        with pytest.raises(ValueError):
+            self.session.set_value(0, 0, 10)
+
+    def test_invalid_matrix_throws_exception(self):
+        with pytest.raises(ValueError):
+            SolverSession(np.zeros((8, 8)))
+
+    def test_multiple_solutions_follow_entries(self):
+        # Removing these values leaves the 5s and 1s in rows 0 and 1, columns 0 and 4 interchangeable
+        two_solutions = np.copy(self.correct_solution)
+        two_solutions[[0, 0, 1, 1], [0, 4, 0, 4]] = 0
+        session = SolverSession(two_solutions)
+
+        assert not session.unique
+
+        other = 6 - session.solution[0, 0]
+        solution = session.set_value(0, 0, other)
+
+        assert solution is not None and solution[0, 0] == other and solution[1, 4] == other
+
+        session.set_value(1, 4, 6 - other)
+
+        assert not session.is_solvable()
+
+        session.set_value(1, 4, 0)
+
+        assert session.is_solvable()
+
+    def test_is_solved(self):
+        open_cells = list(zip(*np.nonzero(self.test_matrix == 0)))
+
+        for row, col in open_cells[:-1]:
+            self.session.set_value(row, col, self.correct_solution[row, col])
+
+        assert not self.session.is_solved()
+
+        row, col = open_cells[-1]
+        self.session.set_value(row, col, self.correct_solution[row, col] % 9 + 1)
+
+        assert not self.session.is_solved()
+
+        self.session.set_value(row, col, self.correct_solution[row, col])
+
+        assert self.session.is_solved()
+
+    def test_duplicate_entry_is_conflict(self):
+        # 3 is already a starting value in row 0
+        self.session.set_value(0, 0, 3)
+
+        assert self.session.is_conflict(0, 0) and self.session.is_conflict(0, 5)
+        assert self.session.has_conflict()
+
+        self.session.set_value(0, 0, 5)
+
+        assert not self.session.is_conflict(0, 0) and not self.session.has_conflict()
+
+    def test_clearing_one_of_two_duplicates(self):
+        self.session.set_value(0, 0, 4)
+        self.session.set_value(0, 1, 4)
+
+        assert self.session.is_conflict(0, 0)
+
+        # The other 4 is still in row 0, and still the only 4 in its column and box
+        self.session.set_value(0, 1, 0)
+
+        assert not self.session.is_conflict(0, 0) and not self.session.has_conflict()
+        assert self.session.unit_counts[0 * 10 + 4] == 1
+
+    def test_conflict_found_without_search(self, monkeypatch):
+        two_solutions = np.copy(self.correct_solution)
+        two_solutions[[0, 0, 1, 1], [0, 4, 0, 4]] = 0
+        session = SolverSession(two_solutions)
+        monkeypatch.setattr(session, 'search', lambda: pytest.fail("searched for a conflicting entry"))
+
+        # 6 is already in row 0
+        assert session.set_value(0, 0, 6) is None
+        assert session.is_conflict(0, 0)
@@ -1,18 +1,22 @@
 import constants
 import pygame
 from constants import SQUARE_SIZE
+from glyph_atlas import get_atlas
 
 class Square:
 
     INNER_SQUARE_SIZE = SQUARE_SIZE - 2
 
-    def __init__(self, win, i, j, value):
+    def __init__(self, win, i, j, value, dirty_rects=None):
         self.win = win
         self.value = value
         self.row = i
         self.col = j
         self.set_pixel_location()
 
+        # Areas of the window changed since the last display update, usually shared by every square of a board
+        self.dirty_rects = [] if dirty_rects is None else dirty_rects
+
         self.selected = False
         self.can_write = (value == 0) # False if square contains a nonempty given starting value
         self.is_correct = -1 # -1 if not currently checked, 1 if correct value, 0 if not
@@ -28,12 +32,19 @@ class Square:
         self.xcord = self.col * SQUARE_SIZE + c_triplet
         self.ycord = self.row * SQUARE_SIZE + r_triplet
 
+    def mark_dirty(self):
+        """
+        Records that the square, including its border, has been drawn and needs to be updated on the display.
+        """
+        self.dirty_rects.append(pygame.Rect(self.xcord - 1, self.ycord - 1, SQUARE_SIZE + 2, SQUARE_SIZE + 2))
+
     def draw(self):
         """
         Draws square with black outline.
         """
         pygame.draw.rect(self.win, constants.BLACK, (self.xcord, self.ycord, SQUARE_SIZE, SQUARE_SIZE))
         pygame.draw.rect(self.win, constants.WHITE, (self.xcord + 1, self.ycord + 1, self.INNER_SQUARE_SIZE, self.INNER_SQUARE_SIZE))
+        self.mark_dirty()
     
     def write_initial_value(self):
         """
@@ -41,15 +52,13 @@ class Square:
         """
         
         if self.value > 0:
-            pygame.font.init()
-            font = pygame.font.SysFont('verdana', 70)
-
-            text_surface = font.render(str(self.value), 1, constants.BLACK)
+            text_surface = get_atlas().get_digit('initial', self.value)
 
             i = self.xcord + int(0.3 * SQUARE_SIZE)
             j = self.ycord 
             
             self.win.blit(text_surface, (i, j))
+            self.mark_dirty()
 
     def update_value(self, value):
         """
@@ -68,21 +77,20 @@ class Square:
                 self.value = value
                 self.delete_value()
 
-                pygame.font.init()
-                font = pygame.font.SysFont('calibri', 75)
-
-                text_surface = font.render(str(self.value), 1, constants.BLACK)
+                text_surface = get_atlas().get_digit('entered', self.value)
 
                 i = self.xcord + int(0.3 * SQUARE_SIZE)
                 j = self.ycord + int(0.15 * SQUARE_SIZE)
                 
                 self.win.blit(text_surface, (i, j))
+                self.mark_dirty()
             
     def delete_value(self):
         """
         Clears the displayed value in the square.
         """
         pygame.draw.rect(self.win, constants.WHITE, (self.xcord + 1, self.ycord + 1, self.INNER_SQUARE_SIZE, self.INNER_SQUARE_SIZE))
+        self.mark_dirty()
 
 
     def select(self):
@@ -93,6 +101,7 @@ class Square:
         if not self.selected:
             self.selected = True
             pygame.draw.rect(self.win, constants.BLUE, (self.xcord-1, self.ycord-1, SQUARE_SIZE+1, SQUARE_SIZE+1), 2)
+            self.mark_dirty()
 
     def deselect(self):
         """
@@ -103,6 +112,7 @@ class Square:
 
             if self.is_correct == -1:
                 pygame.draw.rect(self.win, constants.BLACK, (self.xcord -1 , self.ycord-1, SQUARE_SIZE+1, SQUARE_SIZE+1), 2)
+                self.mark_dirty()
             
             else:
                 self.draw_border(self.is_correct)
@@ -123,6 +133,8 @@ class Square:
         elif self.is_correct == 0:
             pygame.draw.rect(self.win, constants.RED, (self.xcord -1 , self.ycord-1, SQUARE_SIZE+1, SQUARE_SIZE+1), 2)
 
+        self.mark_dirty()
+
     def remove_border(self):
         """
         Removes correctness check from the square. Border is redrawn as black.
@@ -136,3 +148,5 @@ class Square:
         else:
             pygame.draw.rect(self.win, constants.BLACK, (self.xcord -1 , self.ycord-1, SQUARE_SIZE+1, SQUARE_SIZE+1), 2)
 
+        self.mark_dirty()
+
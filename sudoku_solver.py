@@ -1,29 +1,338 @@
 import numpy as np
+from array import array
+from time import perf_counter
+from dlx import DLXSolver, BudgetExceeded
+from grid_tables import get_geometry, get_box_size
+
+# Cell selection strategies for the backtracking search:
+#   - naive: next empty cell left to right, then top to bottom
+#   - mrv: empty cell with the fewest candidates, ties broken by traversal order
+#   - mrv_degree: empty cell with the fewest candidates, ties broken by the most empty cells in its row, column and box
+HEURISTICS = ('naive', 'mrv', 'mrv_degree')
+
+# Search algorithms which can solve the matrix:
+#   - backtracking: bitmask backtracking search using the heuristic and propagation settings
+#   - dlx: exact cover search with dancing links (see dlx.py)
+BACKENDS = ('backtracking', 'dlx')
+
+# Status of a Search
+SOLVED = 'solved'
+NO_SOLUTION = 'no_solution'
+PAUSED = 'paused'
+
+# Returned by SudokuSolver.solve in place of a solution when a budget runs out or the solve is cancelled
+BUDGET_EXCEEDED = 'budget_exceeded'
+
+class GridState:
+    """
+    Compact state of a partly filled grid, used by SudokuSolver while searching. The number in each cell is kept in a
+    flat bytearray, and the digits used in every row, column and box in bitmasks (bit n is set when digit n is present).
+    Reading and writing it is much faster than indexing a numpy array, and clone and restore make cheap snapshots.
+    """
+
+    __slots__ = ('geometry', 'cells', 'row_masks', 'col_masks', 'box_masks')
+
+    def __init__(self, geometry):
+        """
+        Creates an empty grid.
+
+        Arguments:
+            - geometry: Geometry of the grid size.
+        """
+        self.geometry = geometry
+        self.cells = bytearray(geometry.num_cells)
+        self.row_masks = [0] * geometry.size
+        self.col_masks = [0] * geometry.size
+        self.box_masks = [0] * geometry.size
+
+    def load(self, values):
+        """
+        Fills the grid from a flat sequence of numbers, one per cell, replacing its contents.
+        Returns False if any row, column or box contains a number twice, otherwise True.
+        """
+        geometry = self.geometry
+        cells = self.cells
+        row_masks, col_masks, box_masks = self.row_masks, self.col_masks, self.box_masks
+        cells[:] = bytes(len(cells))
+        row_masks[:] = col_masks[:] = box_masks[:] = [0] * geometry.size
+        valid = True
+
+        for cell, num in enumerate(values):
+            if num > 0:
+                cells[cell] = num
+                bit = 1 << num
+                i, j, box = geometry.row_of[cell], geometry.col_of[cell], geometry.box_of[cell]
+
+                if (row_masks[i] | col_masks[j] | box_masks[box]) & bit:
+                    valid = False
+
+                row_masks[i] |= bit
+                col_masks[j] |= bit
+                box_masks[box] |= bit
+
+        return valid
+
+    def place(self, cell, num):
+        """
+        Sets the number of a cell, 0 to empty it.
+        """
+        geometry = self.geometry
+        i, j, box = geometry.row_of[cell], geometry.col_of[cell], geometry.box_of[cell]
+        old_num = self.cells[cell]
+
+        if old_num > 0:
+            clear = ~(1 << old_num)
+            self.row_masks[i] &= clear
+            self.col_masks[j] &= clear
+            self.box_masks[box] &= clear
+
+        if num > 0:
+            bit = 1 << num
+            self.row_masks[i] |= bit
+            self.col_masks[j] |= bit
+            self.box_masks[box] |= bit
+
+        self.cells[cell] = num
+
+    def get_candidates(self, cell):
+        """
+        Returns a bitmask of the digits not yet used in the row, column and box of a cell.
+        """
+        geometry = self.geometry
+        used = (self.row_masks[geometry.row_of[cell]] | self.col_masks[geometry.col_of[cell]] |
+                self.box_masks[geometry.box_of[cell]])
+
+        return ~used & geometry.all_digits
+
+    def clone(self):
+        """
+        Returns an independent copy of the grid.
+        """
+        state = GridState.__new__(GridState)
+        state.geometry = self.geometry
+        state.cells = bytearray(self.cells)
+        state.row_masks = self.row_masks[:]
+        state.col_masks = self.col_masks[:]
+        state.box_masks = self.box_masks[:]
+
+        return state
+
+    def restore(self, other):
+        """
+        Makes the grid a copy of other, a clone of the same size, without allocating new storage.
+        """
+        self.cells[:] = other.cells
+        self.row_masks[:] = other.row_masks
+        self.col_masks[:] = other.col_masks
+        self.box_masks[:] = other.box_masks
+
+    def to_array(self, array):
+        """
+        Writes the grid into a numpy array of shape (size, size).
+        """
+        array[...] = np.frombuffer(self.cells, dtype=np.uint8).reshape(array.shape)
+
+
+class CancelToken:
+    """
+    Stops a solve from another thread. Pass the token to SudokuSolver.solve, then call cancel. The search checks the
+    token every Search.CLOCK_INTERVAL steps, so it stops shortly after.
+    """
+
+    def __init__(self):
+        self.cancelled = False
+
+    def cancel(self):
+        """
+        Asks every solve using this token to stop.
+        """
+        self.cancelled = True
+
+
+class SolverStats:
+    """
+    Counters and timings of the work done by a SudokuSolver created with stats=True. They add up over every search the
+    solver runs until reset is called.
+    """
+
+    # Phases timed in the times dictionary, in seconds:
+    #   - setup: loading the matrix and building its masks
+    #   - propagation: filling naked and hidden singles
+    #   - search: the rest of the search (the whole search for the dlx backend)
+    PHASES = ('setup', 'propagation', 'search')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """
+        Sets every counter and timing back to 0.
+        """
+        # Digits placed by the search, one per node of the search tree (rows of the cover matrix tried for dlx)
+        self.nodes = 0
+        # Dead ends: digits whose propagation failed, and locations whose candidates all failed (rows given up for dlx)
+        self.backtracks = 0
+        # Most locations on the search stack at once (rows chosen at once for dlx, starting values included)
+        self.max_depth = 0
+        # Digits placed by the search while other candidates for the same location were still untried (for dlx, rows
+        # tried while their column had other rows left)
+        self.guesses = 0
+        # Digits placed by propagation (always 0 for dlx, which has no separate propagation)
+        self.deductions = 0
+        self.times = dict.fromkeys(self.PHASES, 0.0)
+
+    def as_dict(self):
+        """
+        Returns the counters and timings as a dictionary, for example to log as JSON.
+        """
+        return {'nodes': self.nodes, 'backtracks': self.backtracks, 'max_depth': self.max_depth,
+                'guesses': self.guesses, 'deductions': self.deductions, 'times': dict(self.times)}
+
+
+class StepLog:
+    """
+    Compact record of every number a solver sets, in order, so that a search can be replayed afterwards, for example
+    to animate it. Pass the record method as the on_place argument of SudokuSolver. Each step is stored as a single
+    integer and read back as a tuple (row, column, number), with number 0 when a location was emptied.
+    """
+
+    def __init__(self):
+        self.steps = array('L')
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __getitem__(self, n):
+        step = self.steps[n]
+
+        return step >> 16, (step >> 8) & 0xFF, step & 0xFF
+
+    def __iter__(self):
+        for n in range(len(self.steps)):
+            yield self[n]
+
+    def record(self, row, col, num):
+        """
+        Appends a step.
+        """
+        self.steps.append(row << 16 | col << 8 | num)
+
 
 class SudokuSolver:
 
-    def __init__(self, matrix):
+    def __init__(self, matrix, heuristic='mrv', propagation=True, backend='backtracking', cache=None, stats=False,
+                 on_place=None, copy=True):
+        """
+        Arguments:
+            - matrix: numpy array or list of lists, with 0 for empty squares. Usually 9x9, but any n^2 x n^2 grid
+              with n x n boxes (such as 4x4, 16x16 or 25x25) can be solved.
+            - heuristic: Strategy used to choose the next location to fill. One of HEURISTICS.
+            - propagation: If True, naked and hidden singles are filled in before the search and after each guess.
+            - backend: Default search algorithm used by solve. One of BACKENDS.
+            - cache: Optional SolutionCache (see solution_cache.py) checked by solve before searching 9x9 matrices.
+            - stats: If True, work done by the solver is recorded in a SolverStats in the stats attribute. Otherwise
+              stats is None and nothing is recorded.
+            - on_place: Optional function called as on_place(row, col, num) every time a number is set in the matrix,
+              by the search, propagation or set_num. num is 0 when a location is emptied again. With the dlx backend
+              it is called for each digit the exact cover search chooses or gives up.
+            - copy: If True, the solver works on its own copy of matrix and solve returns a new array, so neither the
+              input nor the result is ever shared with the solver. If False and matrix is an int32 numpy array, the
+              solver works on it directly: solving fills it in place and solve returns it, with no copies made.
+        """
+        if heuristic not in HEURISTICS:
+            raise ValueError("heuristic must be one of {}".format(HEURISTICS))
+
+        self.check_backend(backend)
+
+        self.heuristic = heuristic
+        self.backend = backend
+        self.cache = cache
+        self.use_propagation = propagation
+        self.stats = SolverStats() if stats else None
+        self.on_place = on_place
+        self.copy = copy
+        self.state = None
         self.set_matrix(matrix)
 
+    @property
+    def matrix(self):
+        """
+        The Sudoku matrix as an int32 numpy array, or None if the given matrix was invalid. The search works on the
+        solver's GridState, in the state attribute, and the array is only brought up to date when it is read.
+        """
+        if not self.synced:
+            self.state.to_array(self.array)
+            self.synced = True
+
+        return self.array
+
+    @matrix.setter
+    def matrix(self, matrix):
+        self.array = matrix
+        self.synced = True
+
     def set_matrix(self, matrix):
         """
         Sets the Sudoku matrix if it is valid type. Use 0 to represent empty squares.
-        Matrix is set to None if it is not of valid shape and contents.
+        Matrix is set to None if it is not of valid shape and contents. It is copied unless the copy attribute is False
+        and it is already an int32 numpy array.
         """
-        try:
-            matrix = matrix.astype('int32')
-            self.matrix = matrix if self.is_valid_matrix(matrix) else None
+        start = perf_counter()
+
+        # Lists and arrays of other types are always converted to a new array
+        matrix = np.array(matrix, dtype=np.int32) if self.copy else np.asarray(matrix, dtype=np.int32)
+        self.matrix = matrix if self.is_valid_matrix(matrix) else None
 
-        except AttributeError:
-            # Handle if matrix is a list
-            matrix = np.array(matrix, dtype=np.int32)
-            self.matrix = matrix if self.is_valid_matrix(matrix) else None
+        self.init_masks()
+
+        if self.stats is not None:
+            self.stats.times['setup'] += perf_counter() - start
+
+    def load_matrix(self, matrix):
+        """
+        Sets the Sudoku matrix without checking or copying it. Matrix must be an int32 numpy array which has already
+        been validated, for example by validate_batch. Solving will fill in the given array in place.
+        """
+        start = perf_counter()
+        self.matrix = matrix
+        self.init_masks()
+
+        if self.stats is not None:
+            self.stats.times['setup'] += perf_counter() - start
+
+    def init_masks(self):
+        """
+        Loads the matrix into the GridState in the state attribute, which holds the cells and the used-digit bitmasks
+        for every row, column and box. Sets has_conflict to True if the starting matrix contains duplicates. Also
+        keeps the Geometry of the matrix size in geometry.
+        """
+        box_size = 3 if self.array is None else get_box_size(self.array.shape[0])
+        geometry = self.geometry = get_geometry(box_size)
+        self.size = geometry.size
+        self.synced = True
+
+        if self.state is None or self.state.geometry is not geometry:
+            self.state = GridState(geometry)
+
+        if self.array is None:
+            self.state.load(())
+            self.has_conflict = False
+
+        else:
+            self.has_conflict = not self.state.load(self.array.ravel().tolist())
+
+    def check_backend(self, backend):
+        """
+        Raises ValueError if backend is not one of BACKENDS.
+        """
+        if backend not in BACKENDS:
+            raise ValueError("backend must be one of {}".format(BACKENDS))
 
     def is_valid_matrix(self, matrix):
         """
-        Returns True if matrix is 9x9 and only contains numbers between 0 and 9.
+        Returns True if matrix is n^2 x n^2 and only contains numbers between 0 and n^2.
         """
-        return self.is_9x9(matrix) and self.is_valid_nums(matrix)
+        return self.is_valid_shape(matrix) and self.is_valid_nums(matrix)
 
     def is_9x9(self, matrix):
         """
@@ -31,129 +340,640 @@ class SudokuSolver:
         """
         return matrix.ndim == 2 and matrix.shape == (9, 9)
 
+    def is_valid_shape(self, matrix):
+        """
+        Returns True if matrix is square with a square number of rows, like 4x4, 9x9 or 16x16.
+        """
+        return matrix.ndim == 2 and matrix.shape[0] == matrix.shape[1] and get_box_size(matrix.shape[0]) is not None
+
     def is_valid_nums(self, matrix):
         """
-        Returns True if matrix only contains numbers 0 to 9 (0 represents empty square).
+        Returns True if matrix only contains numbers 0 to n^2, where n^2 is the number of rows (0 represents empty
+        square).
         """
-        return matrix[(matrix < 0) | (matrix > 9)].sum() == 0
+        return not ((matrix < 0) | (matrix > matrix.shape[0])).any()
 
     def set_num(self, num, row, col):
         """
-        Sets num at position (row, col). Num must be between 0 - 9 (0 represents empty).
+        Sets num at position (row, col). Num must be between 0 and the number of rows (0 represents empty).
+        """
+        if num >= 0 and num <= self.size:
+            self.state.place(row * self.size + col, int(num))
+            self.synced = False
+
+            if self.on_place is not None:
+                self.on_place(row, col, int(num))
+
+    def get_candidates(self, row, col):
+        """
+        Returns a bitmask of the digits not yet used in the row, column and box of position (row, col).
+        Bit n is set if digit n can be placed there.
         """
-        if num >= 0 and num <=9:
-            self.matrix[row, col] = int(num)
-                
+        return self.state.get_candidates(row * self.size + col)
+
     def is_valid_element(self, num, row, col):
         """
         Returns True if num is a valid entry in position (i, j). According to Sudoku rules, there can be no duplicates along a 
-        given row or column, and there must be no duplicates in each 3x3 submatrix.
+        given row or column, and there must be no duplicates in each box (3x3 submatrix for a 9x9 matrix).
         Arguments:
-            - num: int. Number 1-9 to check
+            - num: int. Number 1-9 to check (up to the number of rows for larger matrices)
             - row: int. Row number between 0 and 8
             - col: int. Column number between 0 and 8
         """
 
-        # Check if duplicate in row 
-        for j in range(self.matrix.shape[1]):
-            if j != col and self.matrix[row, j] == num:
-                return False
-        
-        # Check if duplicate in col
-        for i in range(self.matrix.shape[0]):
-            if i != row and self.matrix[i, col] == num:
-                return False
+        cells = self.state.cells
+        size = self.size
 
-        # Check if duplicate in submatrix
-        submatrix_loc = self.get_submatrix_coord(row, col)
+        # Masks can answer directly unless num is the current value of (row, col), which is already counted in them
+        if cells[row * size + col] != num:
+            return bool((self.get_candidates(row, col) >> num) & 1)
+
+        # Check the other cells of its row, column and box
+        for peer in self.geometry.peers[row * size + col]:
+            if cells[peer] == num:
+                return False
 
-        for i in range(submatrix_loc[0], submatrix_loc[0] + 3):
-            for j in range(submatrix_loc[1], submatrix_loc[1] + 3):
-                if (i, j) != (row, col) and self.matrix[i, j] == num:
-                    return False
-                
         return True
 
     def get_submatrix_coord(self, row, col):
         """
         Returns the coordinates of the top left element of the submatrix which contains row i and column j.
         """
-        row_start = (row // 3) * 3
-        col_start = (col // 3) * 3
+        box_size = self.geometry.box_size
+        row_start = (row // box_size) * box_size
+        col_start = (col // box_size) * box_size
 
         return (row_start, col_start)
 
+    def get_box_index(self, row, col):
+        """
+        Returns the index (left to right then top to bottom) of the box which contains row i and column j.
+        """
+        return self.geometry.box_of[row * self.size + col]
+
     def next_loc(self, i, j):
         """
         Returns a tuple for the next empty location to check. Traversal order is left to right, then top to bottom. 
+        Returns (number of rows, 0) if there are no more empty locations.
         """
+        size = self.size
+        cells = self.state.cells
         next_i, next_j = i, j
 
-        while next_i < 9 and next_j < 9 and self.matrix[next_i, next_j] != 0:
-            next_i = next_i if next_j < 8 else next_i + 1
-            next_j = next_j + 1 if next_j < 8 else 0
+        while next_i < size and next_j < size and cells[next_i * size + next_j] != 0:
+            next_i = next_i if next_j < size - 1 else next_i + 1
+            next_j = next_j + 1 if next_j < size - 1 else 0
 
         return next_i, next_j
 
+    def most_constrained_loc(self):
+        """
+        Returns a tuple for the empty location with the fewest candidate digits. Ties are broken according to the
+        heuristic attribute (see HEURISTICS). Returns (number of rows, 0) if there are no empty locations, like
+        next_loc.
+        """
+        geometry = self.geometry
+        state = self.state
+        cells, row_masks, col_masks, box_masks = state.cells, state.row_masks, state.col_masks, state.box_masks
+        row_of, col_of, box_of, popcount = geometry.row_of, geometry.col_of, geometry.box_of, geometry.popcount
+        all_digits = geometry.all_digits
+        use_degree = self.heuristic == 'mrv_degree'
+
+        best_cell = None
+        best_count = geometry.size + 1
+        best_degree = -1
+
+        for cell in range(geometry.num_cells):
+            if cells[cell] == 0:
+                i, j, box = row_of[cell], col_of[cell], box_of[cell]
+                count = popcount[~(row_masks[i] | col_masks[j] | box_masks[box]) & all_digits]
+
+                if count < best_count or (count == best_count and use_degree):
+                    if use_degree:
+                        # Empty cells left in the row, column and box of this location
+                        degree = 3 * geometry.size - popcount[row_masks[i]] - popcount[col_masks[j]] - popcount[box_masks[box]]
+
+                        if count == best_count and degree <= best_degree:
+                            continue
+
+                        best_degree = degree
+
+                    best_cell = cell
+                    best_count = count
+
+                    # A location with one candidate cannot be beaten, and one with none is a dead end
+                    if count <= 1:
+                        break
+
+        if best_cell is None:
+            return (geometry.size, 0)
+
+        return geometry.locs[best_cell]
+
+    def select_loc(self, i, j):
+        """
+        Returns a tuple for the next empty location to fill after (i, j), chosen with the solver's heuristic.
+        """
+        if self.heuristic == 'naive':
+            return self.next_loc(i, j)
+
+        return self.most_constrained_loc()
+
+    def propagate(self):
+        """
+        Repeatedly fills every naked single (a location with only one candidate) and hidden single (a digit with only
+        one possible location in a row, column or box) until no more can be found.
+        Returns a list of the filled locations, or None if the matrix is found to have no solution. In that case any
+        locations filled during this call are emptied again before returning.
+        """
+        geometry = self.geometry
+        state = self.state
+        cells, row_masks, col_masks, box_masks = state.cells, state.row_masks, state.col_masks, state.box_masks
+        row_of, col_of, box_of, locs = geometry.row_of, geometry.col_of, geometry.box_of, geometry.locs
+        all_digits = geometry.all_digits
+
+        placed = []
+        progress = True
+
+        while progress:
+            progress = False
+
+            # Naked singles
+            for cell in range(geometry.num_cells):
+                if cells[cell] == 0:
+                    candidates = ~(row_masks[row_of[cell]] | col_masks[col_of[cell]] | box_masks[box_of[cell]]) & all_digits
+
+                    if candidates == 0:
+                        self.undo(placed)
+                        return None
+
+                    if candidates & (candidates - 1) == 0:
+                        i, j = locs[cell]
+                        self.set_num(candidates.bit_length() - 1, i, j)
+                        placed.append((i, j))
+                        progress = True
+
+            # Hidden singles
+            for unit in geometry.units:
+                filled = once = twice = 0
+
+                for cell in unit:
+                    num = cells[cell]
+
+                    if num > 0:
+                        filled |= 1 << num
+
+                    else:
+                        candidates = ~(row_masks[row_of[cell]] | col_masks[col_of[cell]] | box_masks[box_of[cell]]) & all_digits
+                        twice |= once & candidates
+                        once |= candidates
+
+                # Some digit has nowhere left to go in this unit
+                if filled | once != all_digits:
+                    self.undo(placed)
+                    return None
+
+                singles = once & ~twice
+
+                while singles:
+                    bit = singles & -singles
+                    singles ^= bit
+                    loc = None
+
+                    for cell in unit:
+                        if cells[cell] == 0 and ~(row_masks[row_of[cell]] | col_masks[col_of[cell]] | box_masks[box_of[cell]]) & bit:
+                            loc = locs[cell]
+                            break
+
+                    # Two digits were forced into the same location
+                    if loc is None:
+                        self.undo(placed)
+                        return None
+
+                    self.set_num(bit.bit_length() - 1, loc[0], loc[1])
+                    placed.append(loc)
+                    progress = True
+
+        return placed
+
+    def undo(self, placed):
+        """
+        Empties the given list of locations, in reverse order.
+        """
+        for i, j in reversed(placed):
+            self.set_num(0, i, j)
+
     def is_final_solution(self):
         """
         Returns True if every element is valid. Should only be used to check condition of the final filled matrix.
         Will return False if matrix contains any empty elements.
         """
         
-        if 0 in self.matrix:
+        state = self.state
+
+        if 0 in state.cells:
             return False
 
-        for i in range(self.matrix.shape[0]):
-            for j in range(self.matrix.shape[1]):
-                if not self.is_valid_element(self.matrix[i, j], i, j):
-                    return False
+        # With no empty cells, each unit is valid exactly when it holds every digit
+        all_digits = self.geometry.all_digits
+
+        for k in range(self.size):
+            if not (state.row_masks[k] == state.col_masks[k] == state.box_masks[k] == all_digits):
+                return False
 
         return True
 
     def find_solution(self, i, j):
         """
-        Recursive backtracking algorithm to find a valid solution for the Sudoku matrix.
+        Backtracking algorithm to find a valid solution for the Sudoku matrix, starting by filling position (i, j).
+        Runs a Search until it finishes.
         Returns True if a solution is found.
         """
+        return Search(self, i, j).run() == SOLVED
 
-        # Base case
-        if 0 not in self.matrix:
-            # Only need to check full validity if no empty cells are present (like in case that Solver is passed a bad full matrix)
-            # Otherwise algorithm will ensure validity at all steps
-            return self.is_final_solution()
+    def run_propagation(self):
+        """
+        Calls propagate, recording its time and the number of filled locations if stats are enabled.
+        """
+        if self.stats is None:
+            return self.propagate()
+
+        start = perf_counter()
+        placed = self.propagate()
+        self.stats.times['propagation'] += perf_counter() - start
+
+        if placed is None:
+            self.stats.backtracks += 1
 
         else:
-            num = 1
-            is_solution = False
-
-            while num < 10 and not is_solution:
-                # Check if num is valid in position (i,j)
-                if self.is_valid_element(num, i, j):
-                    self.set_num(num, i, j)
-                
-                    # Determine next position to fill
-                    next_i, next_j = self.next_loc(i, j)
-
-                    # Recursivly see if this leads to a solution.
-                    is_solution = self.find_solution(next_i, next_j)
-    
-                num += 1
+            self.stats.deductions += len(placed)
 
-            # Reset to 0 (empty) if all numbers tried and no solution in this path
-            if not is_solution:
-                self.set_num(0, i, j)
-                
-            return is_solution
+        return placed
 
-    def solve(self):
+    def start_search(self):
+        """
+        Prepares a backtracking Search of the matrix which can be run in slices, and returns it. Any singles forced by
+        the starting values are filled in first if propagation is enabled.
+        """
+        valid = self.matrix is not None and not self.has_conflict
+        placed = self.run_propagation() if valid and self.use_propagation else []
+
+        if not valid or placed is None:
+            search = Search(self, self.size, 0)
+            search.status = NO_SOLUTION
+
+            return search
+
+        start_i, start_j = self.select_loc(0, 0)
+
+        return Search(self, start_i, start_j, placed)
+
+    def count_solutions(self, limit=None):
+        """
+        Counts the solutions of the matrix with the backtracking search, stopping as soon as limit solutions have been
+        found. The matrix is left unchanged.
+
+        Arguments:
+            - limit: Maximum number of solutions to count. Counts every solution if None.
+        """
+        if self.matrix is None:
+            return 0
+
+        puzzle = self.state.clone()
+        search = self.start_search()
+        count = 0
+
+        while search.run() == SOLVED:
+            count += 1
+
+            if limit is not None and count >= limit:
+                break
+
+            search.resume()
+
+        self.state.restore(puzzle)
+        self.synced = False
+
+        return count
+
+    def has_unique_solution(self):
+        """
+        Returns True if the matrix has exactly one solution. The search stops as soon as a second one is found.
+        """
+        return self.count_solutions(limit=2) == 1
+
+    def solve(self, backend=None, timeout=None, max_nodes=None, cancel=None, out=None):
         """
         Solves the Sudoku matrix, and returns the solution as numpy array. Solution can be accessed in matrix attribute.
+        The returned array is a new copy unless out is given or the solver was created with copy=False (see __init__).
+        Returns None if there is no solution, or BUDGET_EXCEEDED if a limit is reached or the solve is cancelled
+        before the search finishes. In that case the matrix is reset to the values it had before the call.
+
+        Arguments:
+            - backend: Search algorithm to use for this call, one of BACKENDS. Defaults to the backend attribute.
+            - timeout: Maximum number of seconds to search. No limit if None.
+            - max_nodes: Maximum number of search steps (rows tried for the dlx backend). No limit if None.
+            - cancel: Optional CancelToken which another thread can use to stop the search.
+            - out: Optional numpy array of the same shape as the matrix. The solution is written into it and it is
+              returned, so no new array is allocated. Left unchanged if there is no solution.
+        """
+        backend = self.backend if backend is None else backend
+        self.check_backend(backend)
+
+        if out is not None and self.matrix is not None and out.shape != self.matrix.shape:
+            raise ValueError("out must have shape {}".format(self.matrix.shape))
+
+        if self.matrix is None or self.has_conflict:
+            return None
+
+        deadline = None if timeout is None else perf_counter() + timeout
+        limited = timeout is not None or max_nodes is not None or cancel is not None
+
+        # Canonical forms are only defined for 9x9 matrices
+        use_cache = self.cache is not None and self.size == 9
+
+        if use_cache:
+            puzzle = np.copy(self.matrix)
+            found, solution, form = self.cache.lookup(puzzle)
+
+            if found:
+                if solution is None:
+                    return None
+
+                self.matrix[:] = solution
+                self.init_masks()
+
+                return self.get_result(out)
+
+        if backend == 'dlx':
+            start = perf_counter()
+            dlx = DLXSolver(self.matrix)
+
+            try:
+                time_limit = None if deadline is None else deadline - start
+                solution = dlx.solve(max_nodes, time_limit, cancel, self.on_place)
+
+            except BudgetExceeded:
+                return BUDGET_EXCEEDED
+
+            finally:
+                if self.stats is not None:
+                    self.stats.times['search'] += perf_counter() - start
+                    self.stats.nodes += dlx.nodes
+                    self.stats.guesses += dlx.guesses
+                    self.stats.backtracks += dlx.backtracks
+                    self.stats.max_depth = max(self.stats.max_depth, dlx.max_depth)
+
+            if solution is not None:
+                self.matrix[:] = solution
+                self.init_masks()
+
+        else:
+            if limited:
+                start_state = self.state.clone()
+
+            search = self.start_search()
+            time_limit = None if deadline is None else deadline - perf_counter()
+            status = search.run(max_nodes, time_limit, cancel)
+
+            if status == PAUSED:
+                self.state.restore(start_state)
+                self.synced = False
+
+                return BUDGET_EXCEEDED
+
+            solution = self.matrix if status == SOLVED else None
+
+        if use_cache:
+            self.cache.add(puzzle, solution, form)
+
+        return None if solution is None else self.get_result(out)
+
+    def get_result(self, out):
         """
-        start_i, start_j = self.next_loc(0, 0)
-        has_solution = self.find_solution(start_i, start_j)
+        Returns the solved matrix to hand back from solve: written into out if it is given, the matrix itself if the
+        solver does not copy, otherwise a new copy of it.
+        """
+        if out is not None:
+            out[:] = self.matrix
+            return out
+
+        return np.copy(self.matrix) if self.copy else self.matrix
+
+
+class Search:
+    """
+    Iterative backtracking search over the matrix of a SudokuSolver. Instead of recursing once per empty location, the
+    search keeps an explicit stack with one frame per guessed location, so it has no depth limit and can be paused and
+    resumed between steps. While paused, the solver's matrix holds the partial assignment of the current path.
+    """
+
+    # Check the clock only every this many steps when running with a time limit
+    CLOCK_INTERVAL = 64
+
+    def __init__(self, solver, i, j, propagated=None):
+        """
+        Arguments:
+            - solver: SudokuSolver whose matrix is searched. Its heuristic and propagation settings are used.
+            - i: Row of the first position to fill, or the number of rows if the matrix has no empty positions.
+            - j: Column of the first position to fill.
+            - propagated: Locations filled by propagation before the search started. They are emptied again if the
+              search finds no solution, so the matrix is left as it was.
+        """
+        self.solver = solver
+        self.status = PAUSED
+        self.steps = 0
+        self.propagated = propagated or []
+
+        # Each frame is [row, column, candidates not yet tried, locations filled by propagation for the current guess]
+        self.stack = []
+
+        if i == solver.size:
+            # Only need to check full validity if no empty cells are present (like in case that Solver is passed a bad full matrix)
+            self.status = SOLVED if solver.is_final_solution() else NO_SOLUTION
+
+            if self.status == NO_SOLUTION:
+                solver.undo(self.propagated)
+
+        else:
+            self.stack.append([i, j, solver.get_candidates(i, j), None])
+
+            if solver.stats is not None:
+                solver.stats.max_depth = max(solver.stats.max_depth, 1)
+
+    def resume(self):
+        """
+        Lets the next call to run continue past the solution just found, to look for another one.
+        """
+        if self.status == SOLVED:
+            self.status = PAUSED if self.stack else NO_SOLUTION
+
+    def run(self, max_steps=None, time_limit=None, cancel=None):
+        """
+        Continues the search until it finishes or a limit is reached. Each step tries one digit in one position.
+
+        Arguments:
+            - max_steps: Maximum number of steps to take in this call. No limit if None.
+            - time_limit: Maximum number of seconds to run in this call. No limit if None.
+            - cancel: Optional CancelToken. The search pauses once it is cancelled.
+
+        Returns the status: SOLVED, NO_SOLUTION, or PAUSED if a limit was reached first.
+        """
+        solver = self.solver
+        stack = self.stack
+        use_propagation = solver.use_propagation
+        size = solver.size
+        stats = solver.stats
+        deadline = None if time_limit is None else perf_counter() + time_limit
+        steps = 0
+
+        if stats is not None:
+            start = perf_counter()
+            propagation_time = stats.times['propagation']
+
+        while self.status == PAUSED:
+            if max_steps is not None and steps >= max_steps:
+                break
+
+            if deadline is not None and steps % self.CLOCK_INTERVAL == 0 and perf_counter() >= deadline:
+                break
+
+            if cancel is not None and steps % self.CLOCK_INTERVAL == 0 and cancel.cancelled:
+                break
+
+            steps += 1
+            frame = stack[-1]
+            i, j, candidates, placed = frame
+
+            # Empty the locations forced by the previous guess here, whose path failed
+            if placed:
+                solver.undo(placed)
+
+            if not candidates:
+                # Reset to 0 (empty) if all numbers tried and no solution in this path
+                solver.set_num(0, i, j)
+                stack.pop()
+
+                if stats is not None:
+                    stats.backtracks += 1
+
+                if not stack:
+                    self.status = NO_SOLUTION
+                    solver.undo(self.propagated)
+
+                continue
+
+            # Take the lowest remaining digit
+            bit = candidates & -candidates
+            frame[2] = candidates ^ bit
+            solver.set_num(bit.bit_length() - 1, i, j)
+
+            if stats is not None:
+                stats.nodes += 1
+
+                if candidates != bit:
+                    stats.guesses += 1
+
+            if use_propagation:
+                placed = solver.propagate() if stats is None else solver.run_propagation()
+
+            else:
+                placed = None
+
+            frame[3] = placed
+
+            if use_propagation and placed is None:
+                continue
+
+            # Determine next position to fill
+            next_i, next_j = solver.select_loc(i, j)
+
+            if next_i == size:
+                if solver.is_final_solution():
+                    self.status = SOLVED
+
+            else:
+                stack.append([next_i, next_j, solver.get_candidates(next_i, next_j), None])
+
+                if stats is not None and len(stack) > stats.max_depth:
+                    stats.max_depth = len(stack)
+
+        self.steps += steps
+
+        if stats is not None:
+            # Propagation during the search was timed separately
+            stats.times['search'] += perf_counter() - start - (stats.times['propagation'] - propagation_time)
+
+        return self.status
+
+
+# Number of puzzles validated at once by validate_batch, which bounds its temporary memory use
+VALIDATION_CHUNK = 4096
+
+def validate_batch(puzzles):
+    """
+    Checks a whole batch of puzzles at once. Returns a boolean array which is True for each puzzle that only contains
+    numbers 0 to n^2 and has no duplicate starting values in any row, column or box (0 to 9 and 3x3 boxes for 9x9).
+
+    Arguments:
+        - puzzles: numpy array of shape (N, 9, 9), or (N, n^2, n^2) for puzzles with n x n boxes.
+    """
+    size = puzzles.shape[1]
+    box_size = get_box_size(size)
+    valid = np.zeros(len(puzzles), dtype=bool)
+    digits = np.arange(1, size + 1)
+
+    for start in range(0, len(puzzles), VALIDATION_CHUNK):
+        chunk = puzzles[start:start + VALIDATION_CHUNK]
+        in_range = ((chunk >= 0) & (chunk <= size)).all(axis=(1, 2))
+
+        # counts[n, i, j, d] is 1 if puzzle n has digit d + 1 in position (i, j)
+        counts = (chunk[..., None] == digits).astype(np.int8)
+        row_counts = counts.sum(axis=2)
+        col_counts = counts.sum(axis=1)
+        box_counts = counts.reshape(-1, box_size, box_size, box_size, box_size, size).sum(axis=(2, 4))
+
+        valid[start:start + VALIDATION_CHUNK] = (in_range &
+                                                 (row_counts.max(axis=(1, 2)) <= 1) &
+                                                 (col_counts.max(axis=(1, 2)) <= 1) &
+                                                 (box_counts.max(axis=(1, 2, 3)) <= 1))
+
+    return valid
+
+def solve_many(puzzles, **solver_options):
+    """
+    Solves a batch of puzzles with a single SudokuSolver. The batch is validated in one vectorized pass and each valid
+    puzzle is then solved in place in the returned array, so no per-puzzle solver objects or checks are needed.
+
+    Arguments:
+        - puzzles: numpy array or nested lists of shape (N, 9, 9), with 0 for empty squares. Puzzles with n x n boxes,
+          of shape (N, n^2, n^2), are also accepted.
+        - solver_options: Keyword arguments passed to SudokuSolver, such as heuristic or backend.
+
+    Returns a tuple (solutions, solved). solutions is an int32 array of the same shape as puzzles and solved is a boolean array
+    of shape (N,). Where solved is False the puzzle was invalid or has no solution, and solutions holds the puzzle
+    unchanged.
+    """
+    puzzles = np.asarray(puzzles)
+    solutions = puzzles.astype(np.int32)
+
+    if solutions.ndim != 3 or solutions.shape[1] != solutions.shape[2] or get_box_size(solutions.shape[1]) is None:
+        raise ValueError("puzzles must have shape (N, 9, 9) or (N, n^2, n^2)")
+
+    valid = validate_batch(solutions)
+    solved = np.zeros(len(solutions), dtype=bool)
+    solver = SudokuSolver(np.zeros(solutions.shape[1:], dtype=np.int32), copy=False, **solver_options)
+
+    for n in np.flatnonzero(valid):
+        solver.load_matrix(solutions[n])
+
+        if solver.solve() is not None:
+            solved[n] = True
+
+        else:
+            solutions[n] = puzzles[n]
 
-        return self.matrix if has_solution else None
+    return solutions, solved
 
 
 if __name__ == '__main__':
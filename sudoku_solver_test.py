@@ -1,4 +1,5 @@
-from sudoku_solver import SudokuSolver
+from sudoku_solver import SudokuSolver, GridState, StepLog, CancelToken, get_geometry, solve_many, validate_batch, SOLVED, NO_SOLUTION, PAUSED, BUDGET_EXCEEDED
+from solve_file import parse_line
 import numpy as np
 import pytest
 
@@ -70,6 +71,24 @@ class TestSudokuSolver:
     def test_invalid_num_in_submatrix(self):
         assert self.test_sudoku_solver.is_valid_element(1, 0, 2) == False
 
+    def test_get_box_index(self):
+        assert self.test_sudoku_solver.get_box_index(4, 7) == 5
+
+    def test_get_candidates(self):
+        candidates = self.test_sudoku_solver.get_candidates(1, 1)
+        assert [num for num in range(1, 10) if (candidates >> num) & 1] == [2, 5, 9]
+
+    def test_set_num_updates_masks(self):
+        self.test_sudoku_solver.set_num(2, 1, 1)
+        assert not (self.test_sudoku_solver.get_candidates(1, 2) >> 2) & 1
+
+        self.test_sudoku_solver.set_num(0, 1, 1)
+        assert (self.test_sudoku_solver.get_candidates(1, 2) >> 2) & 1
+
+    def test_duplicate_starting_nums_flag_conflict(self):
+        assert SudokuSolver(np.ones((9, 9))).has_conflict == True
+        assert self.test_sudoku_solver.has_conflict == False
+
     def test_next_loc(self):
         i, j = 0, 5
 
@@ -135,7 +154,8 @@ class TestSudokuSolver:
         assert incorrect_matrix_solver.solve() == None
 
     def test_solution_is_found_with_empty_starting_matrix(self):
-        empty_matrix_solver = SudokuSolver(np.zeros((9, 9)))
+        # Naive traversal order finds the first solution in reading order
+        empty_matrix_solver = SudokuSolver(np.zeros((9, 9)), heuristic='naive')
         empty_matrix_solution = np.array([[1, 2, 3, 4, 5, 6, 7, 8, 9],
                                             [4, 5, 6, 7, 8, 9, 1, 2, 3],
                                             [7, 8, 9, 1, 2, 3, 4, 5, 6],
@@ -172,7 +192,406 @@ class TestSudokuSolver:
         nonempty_first_element_solver = SudokuSolver(matrix_nonempty_first_elem)
         assert np.array_equal(nonempty_first_element_solver.solve(), nonempty_first_elem_solution)
 
+    def test_invalid_heuristic_throws_exception(self):
+        with pytest.raises(ValueError):
+            SudokuSolver(self.test_matrix, heuristic='random')
+
+    def test_most_constrained_loc(self):
+        # 9 is the only digit left for (0, 3)
+        assert self.test_sudoku_solver.most_constrained_loc() == (0, 3)
+
+    @pytest.mark.parametrize('heuristic', ['naive', 'mrv', 'mrv_degree'])
+    def test_correct_solution_each_heuristic(self, heuristic):
+        solver = SudokuSolver(self.test_matrix, heuristic=heuristic)
+
+        assert np.array_equal(solver.solve(), self.correct_solution)
+
+    @pytest.mark.parametrize('heuristic', ['mrv', 'mrv_degree'])
+    def test_valid_solution_found_with_empty_starting_matrix(self, heuristic):
+        empty_matrix_solver = SudokuSolver(np.zeros((9, 9)), heuristic=heuristic)
+
+        assert empty_matrix_solver.solve() is not None
+        assert empty_matrix_solver.is_final_solution()
+
+    def test_propagate_solves_easy_puzzle_without_guessing(self):
+        placed = self.test_sudoku_solver.propagate()
+
+        assert len(placed) == 43
+        assert np.array_equal(self.test_sudoku_solver.matrix, self.correct_solution)
+
+    def test_propagate_contradiction_restores_matrix(self):
+        # 8 is already in column 8, and row 0 then has nowhere left for its 7
+        self.test_sudoku_solver.set_num(8, 0, 8)
+
+        assert self.test_sudoku_solver.propagate() is None
+        assert self.test_sudoku_solver.matrix[0, 8] == 8
+        assert np.count_nonzero(self.test_sudoku_solver.matrix) == 38
+
+    def test_undo(self):
+        candidates = self.test_sudoku_solver.get_candidates(1, 2)
+        self.test_sudoku_solver.set_num(9, 1, 1)
+        self.test_sudoku_solver.set_num(2, 1, 2)
+        self.test_sudoku_solver.undo([(1, 1), (1, 2)])
+
+        assert self.test_sudoku_solver.matrix[1, 1] == 0 and self.test_sudoku_solver.matrix[1, 2] == 0
+        assert self.test_sudoku_solver.get_candidates(1, 2) == candidates
+
+    @pytest.mark.parametrize('heuristic', ['naive', 'mrv'])
+    def test_correct_solution_without_propagation(self, heuristic):
+        solver = SudokuSolver(self.test_matrix, heuristic=heuristic, propagation=False)
+
+        assert np.array_equal(solver.solve(), self.correct_solution)
+
+    @pytest.mark.parametrize('backend', ['backtracking', 'dlx'])
+    def test_correct_solution_each_backend(self, backend):
+        solver = SudokuSolver(self.test_matrix, backend=backend)
+
+        assert np.array_equal(solver.solve(), self.correct_solution)
+        assert np.array_equal(solver.matrix, self.correct_solution)
+
+    def test_solve_backend_argument(self):
+        assert np.array_equal(self.test_sudoku_solver.solve(backend='dlx'), self.correct_solution)
+
+    def test_dlx_backend_incorrect_filled_matrix(self):
+        assert SudokuSolver(np.ones((9, 9)), backend='dlx').solve() is None
+
+    def test_invalid_backend_throws_exception(self):
+        with pytest.raises(ValueError):
+            self.test_sudoku_solver.solve(backend='sat')
+
+    def test_search_pause_and_resume(self):
+        solver = SudokuSolver(self.test_matrix, propagation=False)
+        search = solver.start_search()
+
+        assert search.run(max_steps=5) == PAUSED
+        assert search.steps == 5
+
+        while search.run(max_steps=5) == PAUSED:
+            pass
+
+        assert search.status == SOLVED
+        assert np.array_equal(solver.matrix, self.correct_solution)
+
+    def test_search_time_limit(self):
+        search = SudokuSolver(np.zeros((9, 9)), heuristic='naive', propagation=False).start_search()
+
+        assert search.run(time_limit=0) == PAUSED
+        assert search.run() == SOLVED
+
+    def test_search_no_solution(self):
+        search = SudokuSolver(np.ones((9, 9))).start_search()
+
+        assert search.run() == NO_SOLUTION
+
+    def test_unsolvable_matrix_left_unchanged(self):
+        # Conflict-free, but the added 6 at (0, 1) leaves no solution once propagation has filled some locations
+        puzzle = parse_line('860000000003600000070090200050007000000045700000100030001000068008500010090000400')
+        solver = SudokuSolver(puzzle, copy=False)
+
+        assert solver.solve() is None
+        assert np.array_equal(solver.matrix, parse_line(
+            '860000000003600000070090200050007000000045700000100030001000068008500010090000400'))
+        assert np.count_nonzero(puzzle) == 22
+
+    def test_search_finished_run_does_nothing(self):
+        search = self.test_sudoku_solver.start_search()
+        search.run()
+        steps = search.steps
+
+        assert search.run() == SOLVED
+        assert search.steps == steps
+
+    def test_find_solution(self):
+        solver = SudokuSolver(self.test_matrix, propagation=False)
+
+        assert solver.find_solution(0, 0) == True
+        assert np.array_equal(solver.matrix, self.correct_solution)
+
+    def test_validate_batch(self):
+        invalid_nums = np.where(self.test_matrix == 9, 10, self.test_matrix)
+        duplicate_in_box = np.copy(self.test_matrix)
+        duplicate_in_box[1, 1] = 6
+        batch = np.stack([self.test_matrix, invalid_nums, np.ones((9, 9)), duplicate_in_box, self.correct_solution])
+
+        assert list(validate_batch(batch)) == [True, False, False, False, True]
+
+    def test_solve_many(self):
+        unsolvable = np.copy(self.test_matrix)
+        unsolvable[0, 0] = 4
+        batch = np.stack([self.test_matrix, np.ones((9, 9)), unsolvable, self.correct_solution])
+
+        solutions, solved = solve_many(batch)
+
+        assert list(solved) == [True, False, False, True]
+        assert np.array_equal(solutions[0], self.correct_solution)
+        assert np.array_equal(solutions[1], np.ones((9, 9)))
+        assert np.array_equal(solutions[2], unsolvable)
+        assert np.array_equal(batch[0], self.test_matrix)
+
+    def test_solve_many_solver_options(self):
+        solutions, solved = solve_many([self.test_matrix], backend='dlx')
+
+        assert solved[0] and np.array_equal(solutions[0], self.correct_solution)
+
+    def test_solve_many_invalid_shape_throws_exception(self):
+        with pytest.raises(ValueError):
+            solve_many(np.zeros((2, 8, 8)))
+
+    def test_count_solutions_unique(self):
+        assert self.test_sudoku_solver.count_solutions() == 1
+        assert np.array_equal(self.test_sudoku_solver.matrix, self.test_matrix)
+
+    def test_count_solutions_multiple(self):
+        # Removing these values leaves the 5s and 1s in rows 0 and 1, columns 0 and 4 interchangeable
+        two_solutions = np.copy(self.correct_solution)
+        two_solutions[[0, 0, 1, 1], [0, 4, 0, 4]] = 0
+
+        assert SudokuSolver(two_solutions).count_solutions() == 2
+
+    def test_count_solutions_stops_at_limit(self):
+        assert SudokuSolver(np.zeros((9, 9))).count_solutions(limit=5) == 5
+
+    @pytest.mark.parametrize('propagation', [True, False])
+    def test_count_solutions_no_solution(self, propagation):
+        assert SudokuSolver(np.ones((9, 9)), propagation=propagation).count_solutions() == 0
+
+    def test_count_solutions_filled_matrix(self):
+        assert SudokuSolver(self.correct_solution).count_solutions() == 1
+
+    def test_has_unique_solution(self):
+        assert self.test_sudoku_solver.has_unique_solution()
+        assert not SudokuSolver(np.zeros((9, 9))).has_unique_solution()
+
+    def test_4x4_matrix(self):
+        solver = SudokuSolver([[1, 0, 0, 0],
+                               [0, 0, 3, 0],
+                               [0, 4, 0, 0],
+                               [0, 0, 0, 2]])
+
+        assert solver.size == 4
+        assert np.array_equal(solver.solve(), [[1, 3, 2, 4],
+                                               [4, 2, 3, 1],
+                                               [2, 4, 1, 3],
+                                               [3, 1, 4, 2]])
+
+    @pytest.mark.parametrize('heuristic', ['naive', 'mrv', 'mrv_degree'])
+    @pytest.mark.parametrize('backend', ['backtracking', 'dlx'])
+    def test_16x16_matrix(self, heuristic, backend):
+        # Pattern solution for 4x4 boxes, with every other value removed from most rows
+        i, j = np.indices((16, 16))
+        solution = (4 * (i % 4) + i // 4 + j) % 16 + 1
+        puzzle = np.where((i + j) % 2 == 0, solution, 0)
+        puzzle[::5] = solution[::5]
+
+        solver = SudokuSolver(puzzle, heuristic=heuristic, backend=backend)
+        result = solver.solve()
+
+        assert result is not None and solver.is_final_solution()
+        assert np.array_equal(result[puzzle > 0], puzzle[puzzle > 0])
+
+    def test_25x25_empty_matrix(self):
+        solver = SudokuSolver(np.zeros((25, 25)))
+
+        assert solver.solve() is not None and solver.is_final_solution()
+
+    @pytest.mark.parametrize('backend', ['backtracking', 'dlx'])
+    def test_36x36_matrix(self, backend):
+        # 1296 locations is more than Python's default recursion limit, so neither backend may recurse per choice
+        i, j = np.indices((36, 36))
+        solution = (6 * (i % 6) + i // 6 + j) % 36 + 1
+        puzzle = np.where(np.random.RandomState(0).rand(36, 36) < 0.7, solution, 0)
+
+        solver = SudokuSolver(puzzle, backend=backend)
+        result = solver.solve()
+
+        assert result is not None and solver.is_final_solution()
+        assert np.array_equal(result[puzzle > 0], puzzle[puzzle > 0])
+
+    def test_non_square_box_size_is_invalid(self):
+        assert SudokuSolver(np.zeros((8, 8))).matrix is None
+        assert SudokuSolver(np.zeros((4, 9))).matrix is None
+        assert SudokuSolver(np.full((4, 4), 5)).matrix is None
+
+    def test_validate_batch_16x16(self):
+        batch = np.zeros((2, 16, 16), dtype=np.int32)
+        batch[1, 0, [0, 15]] = 16
+
+        assert list(validate_batch(batch)) == [True, False]
+
+    def test_solve_many_4x4(self):
+        solutions, solved = solve_many(np.zeros((3, 4, 4)))
+
+        assert solved.all() and solutions.shape == (3, 4, 4)
+
+    def test_stats_disabled_by_default(self):
+        assert self.test_sudoku_solver.stats is None
+
+    def test_stats_propagation_only(self):
+        solver = SudokuSolver(self.test_matrix, stats=True)
+        solver.solve()
+
+        assert solver.stats.deductions == 43
+        assert solver.stats.nodes == solver.stats.guesses == solver.stats.backtracks == 0
+        assert solver.stats.times['setup'] > 0 and solver.stats.times['propagation'] > 0
+
+    def test_stats_search(self):
+        solver = SudokuSolver(self.test_matrix, heuristic='naive', propagation=False, stats=True)
+        solver.solve()
+        stats = solver.stats.as_dict()
+
+        assert stats['nodes'] > 43 and stats['backtracks'] > 0 and stats['deductions'] == 0
+        assert 0 < stats['guesses'] <= stats['nodes']
+        assert stats['max_depth'] == 43
+        assert stats['times']['search'] > 0
+
+    def test_stats_dlx(self):
+        solver = SudokuSolver(parse_line('800000000003600000070090200050007000000045700000100030001000068008500010090000400'),
+                              backend='dlx', stats=True)
+        solver.solve()
+        stats = solver.stats.as_dict()
+
+        # Every location is a row of the cover, so a solution is 81 rows deep
+        assert stats['max_depth'] == 81
+        assert stats['nodes'] >= 81 and stats['backtracks'] > 0 and stats['deductions'] == 0
+        assert 0 < stats['guesses'] <= stats['nodes']
+        assert stats['times']['search'] > 0
+
+    def test_stats_dlx_budget_exceeded(self):
+        solver = SudokuSolver(np.zeros((9, 9)), backend='dlx', stats=True)
+
+        assert solver.solve(max_nodes=10) == BUDGET_EXCEEDED
+        assert solver.stats.nodes > 10
+
+    def test_stats_reset(self):
+        solver = SudokuSolver(self.test_matrix, stats=True)
+        solver.solve()
+        solver.stats.reset()
+
+        assert solver.stats.as_dict() == {'nodes': 0, 'backtracks': 0, 'max_depth': 0, 'guesses': 0, 'deductions': 0,
+                                          'times': {'setup': 0.0, 'propagation': 0.0, 'search': 0.0}}
+
+    def test_on_place_replays_to_solution(self):
+        events = []
+        solver = SudokuSolver(self.test_matrix, heuristic='naive', on_place=lambda *event: events.append(event))
+        solver.solve()
+
+        replay = np.copy(self.test_matrix)
+
+        for row, col, num in events:
+            replay[row, col] = num
+
+        assert events and np.array_equal(replay, self.correct_solution)
+
+    @pytest.mark.parametrize('backend', ['backtracking', 'dlx'])
+    def test_solve_max_nodes_exceeded(self, backend):
+        hard = np.zeros((9, 9), dtype=np.int32)
+        hard[[0, 1, 1, 2, 2, 2, 3, 3, 4, 4, 4, 5, 5, 6, 6, 6, 7, 7, 7, 8, 8],
+             [0, 2, 3, 1, 4, 6, 1, 5, 4, 5, 6, 3, 7, 2, 7, 8, 2, 3, 7, 1, 6]] = \
+            [8, 3, 6, 7, 9, 2, 5, 7, 4, 5, 7, 1, 3, 1, 6, 8, 8, 5, 1, 9, 4]
+        solver = SudokuSolver(hard, backend=backend)
+
+        assert solver.solve(max_nodes=5) == BUDGET_EXCEEDED
+        assert np.array_equal(solver.matrix, hard)
+        assert solver.solve(max_nodes=100000) is not None and solver.is_final_solution()
+
+    @pytest.mark.parametrize('backend', ['backtracking', 'dlx'])
+    def test_solve_timeout(self, backend):
+        solver = SudokuSolver(np.zeros((9, 9)), backend=backend)
+
+        assert solver.solve(timeout=0) == BUDGET_EXCEEDED
+        assert not solver.matrix.any()
+        assert solver.solve(timeout=10) is not None
+
+    @pytest.mark.parametrize('backend', ['backtracking', 'dlx'])
+    def test_solve_cancelled(self, backend):
+        token = CancelToken()
+        token.cancel()
+        solver = SudokuSolver(np.zeros((9, 9)), backend=backend)
+
+        assert solver.solve(cancel=token) == BUDGET_EXCEEDED
+        assert not solver.matrix.any()
+        assert solver.solve(cancel=CancelToken()) is not None
+
+    def test_solve_budget_unsolvable(self):
+        assert SudokuSolver(np.ones((9, 9))).solve(timeout=10, max_nodes=10) is None
+
+    def test_solve_does_not_alias_input_or_solver(self):
+        matrix = self.test_matrix.astype(np.int32)
+        solver = SudokuSolver(matrix)
+        result = solver.solve()
+
+        assert np.array_equal(matrix, self.test_matrix)
+        assert result is not solver.matrix and np.array_equal(result, self.correct_solution)
+
+    def test_solve_in_place_without_copy(self):
+        matrix = self.test_matrix.astype(np.int32)
+        solver = SudokuSolver(matrix, copy=False)
+
+        assert solver.matrix is matrix
+        assert solver.solve() is matrix
+        assert np.array_equal(matrix, self.correct_solution)
+
+    def test_copy_false_still_converts_lists(self):
+        matrix = self.test_matrix.tolist()
+        SudokuSolver(matrix, copy=False).solve()
+
+        assert matrix == self.test_matrix.tolist()
+
+    def test_solve_into_out_buffer(self):
+        out = np.zeros((9, 9), dtype=np.int32)
+
+        assert self.test_sudoku_solver.solve(out=out) is out
+        assert np.array_equal(out, self.correct_solution)
+
+    def test_solve_out_unchanged_without_solution(self):
+        out = np.zeros((9, 9), dtype=np.int32)
+
+        assert SudokuSolver(np.ones((9, 9))).solve(out=out) is None
+        assert not out.any()
+
+    def test_solve_out_wrong_shape_throws_exception(self):
+        with pytest.raises(ValueError):
+            self.test_sudoku_solver.solve(out=np.zeros((4, 4), dtype=np.int32))
+
+    def test_grid_state_load_and_to_array(self):
+        state = GridState(get_geometry(3))
+
+        assert state.load(self.test_matrix.ravel().tolist())
+        assert not state.load(np.ones(81, dtype=int).tolist())
+
+        state.load(self.test_matrix.ravel().tolist())
+        array = np.zeros((9, 9), dtype=np.int32)
+        state.to_array(array)
+
+        assert np.array_equal(array, self.test_matrix)
+
+    def test_grid_state_clone_and_restore(self):
+        state = GridState(get_geometry(3))
+        state.load(self.test_matrix.ravel().tolist())
+        snapshot = state.clone()
+        cells = state.cells
+
+        state.place(0, 5)
+        assert snapshot.cells[0] == 0 and not (state.get_candidates(1) >> 5) & 1
+
+        state.restore(snapshot)
+        assert state.cells is cells and state.cells == snapshot.cells
+        assert (state.get_candidates(1) >> 5) & 1
+
+    def test_matrix_reflects_set_num(self):
+        self.test_sudoku_solver.set_num(5, 0, 0)
 
+        assert self.test_sudoku_solver.matrix[0, 0] == 5
+        assert self.test_sudoku_solver.state.cells[0] == 5
 
+    @pytest.mark.parametrize('backend', ['backtracking', 'dlx'])
+    def test_step_log_replays_to_solution(self, backend):
+        log = StepLog()
+        SudokuSolver(self.test_matrix, backend=backend, on_place=log.record).solve()
+        replay = np.copy(self.test_matrix)
 
+        for row, col, num in log:
+            replay[row, col] = num
 
+        assert len(log) > 0 and log[0] == tuple(log)[0]
+        assert np.array_equal(replay, self.correct_solution)